@@ -0,0 +1,210 @@
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from crossword import *
+from generate import CrosswordCreator
+
+# Word indexes already loaded by this process, keyed by words file, so that
+# every puzzle sharing a vocabulary reuses the same length-bucketed index
+indexes = dict()
+
+
+def load_index(words_file):
+    """Return the (cached) WordIndex for `words_file`."""
+    if words_file not in indexes:
+        indexes[words_file] = WordIndex.load(words_file)
+    return indexes[words_file]
+
+
+def solve_one(structure_file, words_file, output=None, writes=None):
+    """
+    Generate a single crossword and return a dict describing the run:
+    the input files, whether it was solved, the number of search nodes,
+    the time taken in seconds, the solved grid of letters (rows of
+    letters, None for blocked cells) and, if something went wrong, the
+    error.
+
+    If `writes` is a list, the image is written from a background thread
+    and (result, future) is appended to `writes`; `finish_writes` waits for
+    it and records a failed write in the result.
+    """
+    result = {
+        "structure": structure_file,
+        "words": words_file,
+        "solved": False,
+        "nodes": 0,
+        "seconds": 0.0,
+        "output": None,
+        "grid": None,
+        "error": None,
+    }
+    start = time.perf_counter()
+    try:
+        crossword = Crossword(
+            structure_file, words_file, index=load_index(words_file)
+        )
+        creator = CrosswordCreator(crossword)
+        assignment = creator.solve()
+        result["nodes"] = creator.nodes
+        result["solved"] = assignment is not None
+        if assignment is not None:
+            result["grid"] = creator.letter_grid(assignment)
+        if assignment is not None and output:
+            if writes is None:
+                creator.save(assignment, output)
+            else:
+                writes.append(
+                    (result, creator.save(assignment, output, background=True))
+                )
+            result["output"] = output
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def finish_writes(writes, wait=True):
+    """
+    Wait for the background writes in `writes` (or, if `wait` is False,
+    only collect those already done), recording any failure in its result
+    dict, and remove them from the list.
+    """
+    remaining = []
+    for result, future in writes:
+        if not wait and not future.done():
+            remaining.append((result, future))
+            continue
+        try:
+            future.result()
+        except Exception as e:
+            result["output"] = None
+            result["error"] = f"{type(e).__name__}: {e}"
+    writes[:] = remaining
+    if wait:
+        from render import close_renderers
+        close_renderers()
+
+
+def solve_all(puzzles):
+    """
+    Solve every (structure, words, output) tuple in this process, writing
+    images in the background while the next puzzles are solved.
+    """
+    writes = []
+    results = [solve_one(*puzzle, writes=writes) for puzzle in puzzles]
+    if writes:
+        finish_writes(writes)
+    return results
+
+
+def solve_batch(puzzles, workers=None):
+    """
+    Generate many crosswords, given as (structure, words) or
+    (structure, words, output) tuples, and yield one result dict per puzzle
+    (see `solve_one`) in the order they were given.
+
+    Puzzles are grouped by vocabulary so that each worker process loads a
+    words file only once, and the groups are solved concurrently by
+    `workers` processes (all CPUs by default; 1 solves in this process).
+    Images are written from background threads while solving continues.
+    """
+    puzzles = [
+        (puzzle[0], puzzle[1], puzzle[2] if len(puzzle) > 2 else None)
+        for puzzle in puzzles
+    ]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(puzzles) <= 1:
+        # Yield each result once its image is written, in order
+        writes = []
+        results = deque()
+        for puzzle in puzzles:
+            results.append(solve_one(*puzzle, writes=writes))
+            finish_writes(writes, wait=False)
+            pending = {id(result) for result, _ in writes}
+            while results and id(results[0]) not in pending:
+                yield results.popleft()
+        if writes:
+            finish_writes(writes)
+        yield from results
+        return
+
+    # Split each vocabulary's puzzles into roughly `workers` chunks, keeping
+    # a chunk to a single vocabulary so its index is loaded once per chunk
+    groups = dict()
+    for k, puzzle in enumerate(puzzles):
+        groups.setdefault(puzzle[1], []).append(k)
+    chunk_size = max(1, len(puzzles) // workers)
+    chunks = []
+    for ids in groups.values():
+        for start in range(0, len(ids), chunk_size):
+            chunks.append(ids[start:start + chunk_size])
+
+    results = [None] * len(puzzles)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(solve_all, [puzzles[k] for k in chunk])
+            for chunk in chunks
+        ]
+        next_result = 0
+        for chunk, future in zip(chunks, futures):
+            for k, result in zip(chunk, future.result()):
+                results[k] = result
+            while (next_result < len(results)
+                   and results[next_result] is not None):
+                yield results[next_result]
+                next_result += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate many crosswords and report one JSON line each."
+    )
+    parser.add_argument(
+        "puzzles", nargs="+", metavar="structure:words",
+        help="structure and words files separated by a colon"
+    )
+    parser.add_argument(
+        "-n", "--runs", type=int, default=1,
+        help="number of times to generate each crossword"
+    )
+    parser.add_argument(
+        "-j", "--workers", type=int, default=None,
+        help="number of worker processes (default: number of CPUs)"
+    )
+    parser.add_argument(
+        "-o", "--output-dir", default=None,
+        help="directory to save an image of each solved crossword into"
+    )
+    args = parser.parse_args()
+
+    puzzles = []
+    for run in range(1, args.runs + 1):
+        for pair in args.puzzles:
+            try:
+                structure, words = pair.split(":")
+            except ValueError:
+                sys.exit(f"Invalid puzzle {pair!r}, expected structure:words")
+            output = None
+            if args.output_dir:
+                name = "{}_{}".format(
+                    os.path.splitext(os.path.basename(structure))[0],
+                    os.path.splitext(os.path.basename(words))[0]
+                )
+                # Give every run its own image, so no two runs (possibly in
+                # different workers) write the same file
+                if args.runs > 1:
+                    name += f"_{run}"
+                output = os.path.join(args.output_dir, name + ".png")
+            puzzles.append((structure, words, output))
+
+    for result in solve_batch(puzzles, workers=args.workers):
+        print(json.dumps(result), flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+import sys
+import time
+import tracemalloc
+from copy import deepcopy
+
+from crossword import *
+from generate import CrosswordCreator, SearchInterrupted
+
+STRUCTURES = range(3)
+WORDS = range(3)
+
+
+class DeepcopyCreator(CrosswordCreator):
+    """
+    The search as it was before the trail: every node deep-copies all
+    domains and tries each value on a fresh copy. Only used to compare
+    against the trail-based search.
+    """
+
+    def prune(self, var, values):
+        self.domains[var] -= values
+
+    def undo(self, mark):
+        pass
+
+    def iterate(self, assignment):
+        self.nodes += 1
+        if self.node_limit is not None and self.nodes > self.node_limit:
+            raise SearchInterrupted
+        if self.assignment_complete(assignment):
+            yield assignment
+            return
+        var = self.select_unassigned_variable(assignment)
+        domain_values = self.order_domain_values(var, assignment)
+        domains_backup = deepcopy(self.domains)
+        for i in domain_values:
+            self.domains = deepcopy(domains_backup)
+            assignment[var] = i
+            self.domains[var] = {i}
+            arcs = [(j, var) for j, _ in self.crossword.overlapping(var)]
+            if self.ac3(arcs=arcs):
+                inferences = self.infer(assignment)
+                if self.consistent(assignment):
+                    yield from self.iterate(assignment)
+                for j in inferences:
+                    assignment.pop(j)
+        self.domains = domains_backup
+        assignment.pop(var, None)
+
+
+def creator(structure, words, creator_class=CrosswordCreator):
+    crossword = Crossword(
+        f"data/structure{structure}.txt", f"data/words{words}.txt"
+    )
+    return creator_class(crossword)
+
+
+def count_allocations(creator):
+    """
+    Solve with `creator` and return (assignment, blocks allocated during
+    the search).
+
+    The interpreter's count of allocated blocks is sampled on every call
+    and return while searching, and every rise is added up, so blocks that
+    are allocated and freed again (removed-value sets, queues, copies) are
+    counted too, unless both happen inside a single call with no other
+    call in between.
+    """
+    creator.enforce_node_consistency()
+    creator.ac3()
+    counted = [0, 0]
+
+    def profile(frame, event, arg):
+        now = sys.getallocatedblocks()
+        if now > counted[0]:
+            counted[1] += now - counted[0]
+        counted[0] = now
+
+    counted[0] = sys.getallocatedblocks()
+    sys.setprofile(profile)
+    try:
+        assignment = creator.search()
+    finally:
+        sys.setprofile(None)
+    return assignment, counted[1]
+
+
+def run(structure, words):
+    """
+    Solve one (structure, words) pair and return a tuple of
+    (solved, nodes, seconds, live blocks, allocated blocks, peak bytes,
+    trail entries).
+
+    Live blocks are the blocks still allocated once solving is done,
+    while allocated blocks count every block allocated by the search (see
+    `count_allocations`); each is measured on a separate solve so that
+    the timing is not affected.
+    """
+    timed = creator(structure, words)
+
+    # Count how many values get pushed onto the trail during the search
+    pushed = [0]
+    prune = timed.prune
+
+    def counting_prune(var, values):
+        if timed.trail is not None:
+            pushed[0] += 1
+        prune(var, values)
+    timed.prune = counting_prune
+
+    start = time.perf_counter()
+    assignment = timed.solve()
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    creator(structure, words).solve()
+    after = tracemalloc.take_snapshot()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    live = sum(
+        stat.count_diff for stat in after.compare_to(before, "filename")
+        if stat.count_diff > 0
+    )
+
+    _, allocated = count_allocations(creator(structure, words))
+    return (assignment is not None, timed.nodes, seconds, live, allocated,
+            peak, pushed[0])
+
+
+def run_deepcopy(structure, words):
+    """
+    Solve one pair with `DeepcopyCreator` and return a tuple of
+    (nodes, seconds, allocated blocks).
+    """
+    timed = creator(structure, words, DeepcopyCreator)
+    start = time.perf_counter()
+    timed.solve()
+    seconds = time.perf_counter() - start
+    _, allocated = count_allocations(
+        creator(structure, words, DeepcopyCreator)
+    )
+    return timed.nodes, seconds, allocated
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python benchmark.py [repeats]")
+    repeats = int(sys.argv[1]) if len(sys.argv) == 2 else 1
+
+    print(f"{'':<30}{'trail':<44}{'deepcopy'}")
+    print(f"{'puzzle':<8}{'solved':>8}{'nodes':>8}{'ms':>10}"
+          f"{'live/node':>11}{'alloc/node':>12}{'peak KiB':>10}"
+          f"{'trail/node':>12}{'nodes':>8}{'ms':>10}{'alloc/node':>12}")
+    for structure in STRUCTURES:
+        for words in WORDS:
+            for _ in range(repeats):
+                solved, nodes, seconds, live, allocated, peak, pushed = run(
+                    structure, words
+                )
+                nodes = max(nodes, 1)
+                copy_nodes, copy_seconds, copy_allocated = run_deepcopy(
+                    structure, words
+                )
+                copy_nodes = max(copy_nodes, 1)
+                print(f"{structure}_{words:<6}{str(solved):>8}{nodes:>8}"
+                      f"{seconds * 1000:>10.1f}{live / nodes:>11.1f}"
+                      f"{allocated / nodes:>12.1f}{peak / 1024:>10.1f}"
+                      f"{pushed / nodes:>12.1f}{copy_nodes:>8}"
+                      f"{copy_seconds * 1000:>10.1f}"
+                      f"{copy_allocated / copy_nodes:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,7 @@
+import os
+import pickle
+
+
 class Variable():
 
     ACROSS = "across"
@@ -35,9 +39,107 @@ class Variable():
         return f"Variable({self.i}, {self.j}, {direction}, {self.length})"
 
 
+class WordIndex():
+
+    WILDCARD = "?"
+
+    # Bump whenever the pickled layout changes so stale caches get rebuilt
+    VERSION = 2
+
+    def __init__(self, words):
+        """
+        Index a vocabulary by (length, position, letter). Words are
+        upper-cased, as patterns are when querying.
+
+        Words of each length are kept in a sorted list, and every
+        (length, position, letter) key maps to an integer bitset whose bit k
+        is set when the kth word of that length has `letter` at `position`.
+        """
+        self.words = sorted({word.upper() for word in words})
+        self.word_set = frozenset(self.words)
+        self.by_length = dict()
+        for word in self.words:
+            self.by_length.setdefault(len(word), []).append(word)
+
+        self.masks = dict()
+        for length, words in self.by_length.items():
+            for k, word in enumerate(words):
+                bit = 1 << k
+                for position, letter in enumerate(word):
+                    key = (length, position, letter)
+                    self.masks[key] = self.masks.get(key, 0) | bit
+
+    @classmethod
+    def load(cls, words_file):
+        """
+        Return the index for `words_file`, reusing the pickle stored next to
+        it when it is newer than the words file and rebuilding it otherwise.
+        """
+        cache = words_file + ".index"
+        stat = os.stat(words_file)
+        stamp = (cls.VERSION, stat.st_size, stat.st_mtime_ns)
+        try:
+            with open(cache, "rb") as f:
+                cached_stamp, index = pickle.load(f)
+            if cached_stamp == stamp:
+                return index
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+            pass
+
+        with open(words_file) as f:
+            index = cls(f.read().splitlines())
+        try:
+            with open(cache, "wb") as f:
+                pickle.dump((stamp, index), f, pickle.HIGHEST_PROTOCOL)
+        except OSError:
+            pass
+        return index
+
+    def words_of_length(self, length):
+        """Return the sorted list of words with exactly `length` letters."""
+        return self.by_length.get(length, [])
+
+    def mask(self, pattern):
+        """
+        Return the bitset of words (of the pattern's length) that match
+        `pattern`, where `WordIndex.WILDCARD` matches any letter.
+        """
+        length = len(pattern)
+        words = self.by_length.get(length)
+        if not words:
+            return 0
+        mask = (1 << len(words)) - 1
+        for position, letter in enumerate(pattern.upper()):
+            if letter == WordIndex.WILDCARD:
+                continue
+            mask &= self.masks.get((length, position, letter), 0)
+            if not mask:
+                break
+        return mask
+
+    def query(self, pattern):
+        """
+        Return the list of words matching `pattern`, e.g. "A?P?E" returns
+        every five letter word starting with A, ending with E and with P as
+        its third letter.
+        """
+        words = self.by_length.get(len(pattern), [])
+        mask = self.mask(pattern)
+        matches = []
+        while mask:
+            low = mask & -mask
+            matches.append(words[low.bit_length() - 1])
+            mask ^= low
+        return matches
+
+
 class Crossword():
 
-    def __init__(self, structure_file, words_file):
+    def __init__(self, structure_file, words_file, index=None):
+        """
+        Load a crossword structure and its vocabulary. An already loaded
+        `index` for `words_file` can be passed in to share it between puzzles.
+        """
 
         # Determine structure of crossword
         with open(structure_file) as f:
@@ -58,8 +160,8 @@ class Crossword():
                 self.structure.append(row)
 
         # Save vocabulary list
-        with open(words_file) as f:
-            self.words = set(f.read().upper().splitlines())
+        self.index = index or WordIndex.load(words_file)
+        self.words = self.index.word_set
 
         # Determine variable set
         self.variables = set()
@@ -104,30 +206,112 @@ class Crossword():
                             length=length
                         ))
 
+        # Give each variable a dense integer id, in a stable grid order
+        self.variable_list = sorted(
+            self.variables, key=lambda v: (v.i, v.j, v.direction)
+        )
+        self.ids = {var: k for k, var in enumerate(self.variable_list)}
+
+        # Map every cell to the (variable id, position) pairs covering it,
+        # in a single pass over the structure
+        self.cell_variables = dict()
+        across = [[None] * self.width for _ in range(self.height)]
+        down = [[None] * self.width for _ in range(self.height)]
+        for var in self.variable_list:
+            start = across if var.direction == Variable.ACROSS else down
+            start[var.i][var.j] = self.ids[var]
+        column_runs = [None] * self.width
+        for i in range(self.height):
+            run = None
+            for j in range(self.width):
+                if not self.structure[i][j]:
+                    run = None
+                    column_runs[j] = None
+                    continue
+                if across[i][j] is not None:
+                    run = (across[i][j], j)
+                if down[i][j] is not None:
+                    column_runs[j] = (down[i][j], i)
+                covering = []
+                if run is not None:
+                    covering.append((run[0], j - run[1]))
+                if column_runs[j] is not None:
+                    covering.append(
+                        (column_runs[j][0], i - column_runs[j][1])
+                    )
+                if covering:
+                    self.cell_variables[i, j] = covering
+
         # Compute overlaps for each word
-        # For any pair of variables v1, v2, their overlap is either:
-        #    None, if the two variables do not overlap; or
+        # For any pair of overlapping variables v1, v2, their overlap is
         #    (i, j), where v1's ith character overlaps v2's jth character
+        # Pairs that do not overlap are left out; use `overlaps.get` to
+        # receive None for them
         self.overlaps = dict()
-        for v1 in self.variables:
-            for v2 in self.variables:
-                if v1 == v2:
-                    continue
-                cells1 = v1.cells
-                cells2 = v2.cells
-                intersection = set(cells1).intersection(cells2)
-                if not intersection:
-                    self.overlaps[v1, v2] = None
-                else:
-                    intersection = intersection.pop()
-                    self.overlaps[v1, v2] = (
-                        cells1.index(intersection),
-                        cells2.index(intersection)
-                    )
+        self.neighbor_ids = [[] for _ in self.variable_list]
+        self.overlap_ids = [[] for _ in self.variable_list]
+        for covering in self.cell_variables.values():
+            if len(covering) < 2:
+                continue
+            for id1, k1 in covering:
+                for id2, k2 in covering:
+                    if id1 == id2:
+                        continue
+                    self.neighbor_ids[id1].append(id2)
+                    self.overlap_ids[id1].append((k1, k2))
+                    self.overlaps[
+                        self.variable_list[id1], self.variable_list[id2]
+                    ] = (k1, k2)
+
+        self._neighbors = {
+            var: frozenset(
+                self.variable_list[k] for k in self.neighbor_ids[self.ids[var]]
+            )
+            for var in self.variable_list
+        }
+
+        # The same tables as (neighbor, overlap) pairs per variable, for the
+        # solver's inner loops
+        self._overlapping = {
+            var: tuple(
+                (self.variable_list[k], overlap)
+                for k, overlap in zip(
+                    self.neighbor_ids[id1], self.overlap_ids[id1]
+                )
+            )
+            for id1, var in enumerate(self.variable_list)
+        }
 
     def neighbors(self, var):
         """Given a variable, return set of overlapping variables."""
-        return set(
-            v for v in self.variables
-            if v != var and self.overlaps[v, var]
-        )
+        return self._neighbors[var]
+
+    def overlapping(self, var):
+        """
+        Given a variable, return a (neighbor, overlap) pair for every
+        overlapping variable, where `overlap` is `overlaps[var, neighbor]`.
+        """
+        return self._overlapping[var]
+
+    def components(self):
+        """
+        Return the connected components of the overlap graph, each one as a
+        list of variables.
+        """
+        seen = set()
+        components = []
+        for start in range(len(self.variable_list)):
+            if start in seen:
+                continue
+            seen.add(start)
+            frontier = [start]
+            component = []
+            while frontier:
+                k = frontier.pop()
+                component.append(self.variable_list[k])
+                for neighbor in self.neighbor_ids[k]:
+                    if neighbor not in seen:
+                        seen.add(neighbor)
+                        frontier.append(neighbor)
+            components.append(component)
+        return components
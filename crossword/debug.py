@@ -1,22 +1,27 @@
-import os
 import sys
 import time
-import subprocess
+
+from batch import solve_batch
 
 combinations = [(0, 0), (0, 1),(1, 1),(2, 2),(1, 2),(0, 2)]
 
-start = time.time()
-for count in range(int(sys.argv[1])):
-	print("RUN " + str(count + 1))
-	for i in combinations:
-		os.system("python generate.py data/structure{0}.txt data/words{1}.txt > debug/{0}_{1}.{2}.out".format(i[0], i[1], count))
+runs = int(sys.argv[1])
+puzzles = [
+	("data/structure{}.txt".format(i[0]), "data/words{}.txt".format(i[1]))
+	for count in range(runs)
+	for i in combinations
+]
 
-print("Program took {} seconds to execute on average".format((time.time()-start) / (count + 1)))
-proc = subprocess.Popen(["grep 'No solution' debug/*"], stdout=subprocess.PIPE, shell=True)
-(out, err) = proc.communicate()
-out = out.decode()
+start = time.time()
+failed = []
+for count, result in enumerate(solve_batch(puzzles)):
+	if count % len(combinations) == 0:
+		print("RUN " + str(count // len(combinations) + 1))
+	if not result["solved"]:
+		failed.append(result)
 
-print("{} tests did not find any solutions!\n".format(len(out.split("\n")) - 1))
-for i in out.split("\n"):
-	print(i.split(":")[0])
+print("Program took {} seconds to execute on average".format((time.time()-start) / runs))
 
+print("{} tests did not find any solutions!\n".format(len(failed)))
+for result in failed:
+	print("{} {} {}".format(result["structure"], result["words"], result["error"] or "No solution"))
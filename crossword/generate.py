@@ -1,25 +1,57 @@
+import random
 import sys
-from copy import deepcopy
+import time
 
 from crossword import *
+from stats import SearchStats
 
 # I did this project during vacation with a bunch of kids screaming around me, so it is
 # very possible that some parts of the code is sub-optimal and not particularly pretty
 # I do not accept any responsibility if you suffer brain damage or have an
 # aneurysm while reading the code below
 
+class SearchInterrupted(Exception):
+    """Raised inside `backtrack` when the search has to give up early."""
+
+
 class CrosswordCreator():
 
-    def __init__(self, crossword):
+    # How many nodes to expand between two polls of `self.stop`
+    STOP_CHECK_INTERVAL = 64
+
+    def __init__(self, crossword, seed=None):
         """
         Create new CSP crossword generate.
+
+        If `seed` is given, ties in variable and value ordering are broken
+        randomly (but reproducibly), so that differently seeded creators
+        explore the search space in different orders.
         """
         self.crossword = crossword
+        self.random = random.Random(seed) if seed is not None else None
         self.domains = {
-            var: self.crossword.words.copy()
+            var: set(self.crossword.words)
             for var in self.crossword.variables
         }
 
+        # Trail of (variable, removed values) entries, recorded while
+        # searching so that a decision can be undone by putting back only the
+        # values it pruned instead of copying every domain
+        self.trail = None
+        self.nodes = 0
+
+        # Optional search limits: a node budget for a single search, and a
+        # callable polled during the search that returns True to abort it
+        self.node_limit = None
+        self.stop = None
+        self.interrupted = False
+
+        # Variables the search has to assign; None means every variable
+        self.scope = None
+
+        # SearchStats collected while solving, or None when disabled
+        self.stats = None
+
     def letter_grid(self, assignment):
         """
         Return 2D array representing a given assignment.
@@ -52,54 +84,119 @@ class CrosswordCreator():
             print()
         print("-"*self.crossword.width*2)
 
-    def save(self, assignment, filename):
+    def save(self, assignment, filename, cell_size=100, background=False):
         """
         Save crossword assignment to an image file.
-        """
-        from PIL import Image, ImageDraw, ImageFont
-        cell_size = 100
-        cell_border = 2
-        interior_size = cell_size - 2 * cell_border
-        letters = self.letter_grid(assignment)
 
-        # Create a blank canvas
-        img = Image.new(
-            "RGBA",
-            (self.crossword.width * cell_size,
-             self.crossword.height * cell_size),
-            "black"
+        With `background`, the file is written from a background thread and
+        a Future is returned; `render.close_renderers` waits for all writes.
+        """
+        from render import get_renderer
+        renderer = get_renderer(cell_size)
+        if background:
+            return renderer.save_async(
+                self.crossword.structure, self.letter_grid(assignment),
+                filename
+            )
+        renderer.save(
+            self.crossword.structure, self.letter_grid(assignment), filename
         )
-        font = ImageFont.truetype("assets/fonts/OpenSans-Regular.ttf", 80)
-        draw = ImageDraw.Draw(img)
 
-        for i in range(self.crossword.height):
-            for j in range(self.crossword.width):
+    def solve(self, node_limit=None, stats=False):
+        """
+        Enforce node and arc consistency, and then solve the CSP.
 
-                rect = [
-                    (j * cell_size + cell_border,
-                     i * cell_size + cell_border),
-                    ((j + 1) * cell_size - cell_border,
-                     (i + 1) * cell_size - cell_border)
-                ]
-                if self.crossword.structure[i][j]:
-                    draw.rectangle(rect, fill="white")
-                    if letters[i][j]:
-                        w, h = draw.textsize(letters[i][j], font=font)
-                        draw.text(
-                            (rect[0][0] + ((interior_size - w) / 2),
-                             rect[0][1] + ((interior_size - h) / 2) - 10),
-                            letters[i][j], fill="black", font=font
-                        )
+        If `stats` is True, also collect search statistics and return a
+        tuple (assignment, SearchStats) instead of just the assignment.
+        """
+        if not stats:
+            self.stats = None
+            self.enforce_node_consistency()
+            self.ac3()
+            return self.search(node_limit)
+
+        self.stats = SearchStats()
+        start = time.perf_counter()
+        self.enforce_node_consistency()
+        checkpoint = time.perf_counter()
+        self.stats.times["enforce_node_consistency"] = checkpoint - start
+        self.ac3()
+        start, checkpoint = checkpoint, time.perf_counter()
+        self.stats.times["ac3"] = checkpoint - start
+        assignment = self.search(node_limit)
+        self.stats.times["backtrack"] = time.perf_counter() - checkpoint
+        self.stats.nodes = self.nodes
+        return assignment, self.stats
+
+    def search(self, node_limit=None):
+        """
+        Run backtracking search from the current (already consistent)
+        domains. The domains are restored once the search is over, so that
+        `search` can be called again, e.g. to restart with another ordering.
 
-        img.save(filename)
+        If `node_limit` nodes get expanded or `self.stop()` returns True, the
+        search gives up: None is returned and `self.interrupted` is set.
+        """
+        self.trail = []
+        self.nodes = 0
+        self.node_limit = node_limit
+        self.interrupted = False
+        try:
+            return self.backtrack(dict())
+        except SearchInterrupted:
+            self.interrupted = True
+            return None
+        finally:
+            self.undo(0)
+            self.trail = None
 
-    def solve(self):
+    def solutions(self):
         """
-        Enforce node and arc consistency, and then solve the CSP.
+        Enforce node and arc consistency, and then lazily generate every
+        solution of the CSP, each one as a new assignment dict.
         """
         self.enforce_node_consistency()
-        self.ac3()
-        return self.backtrack(dict())
+        if not self.ac3():
+            return
+        self.trail = []
+        self.nodes = 0
+        self.node_limit = None
+        try:
+            for assignment in self.iterate(dict()):
+                yield dict(assignment)
+        finally:
+            self.undo(0)
+            self.trail = None
+
+    def count_solutions(self):
+        """
+        Enforce node and arc consistency, and then return the number of
+        solutions of the CSP.
+
+        Variables in different connected components of the overlap graph
+        do not constrain each other, so each component is counted on its
+        own and the counts are multiplied together.
+        """
+        self.enforce_node_consistency()
+        if not self.ac3():
+            return 0
+        self.trail = []
+        self.nodes = 0
+        self.node_limit = None
+        total = 1
+        try:
+            for component in self.crossword.components():
+                self.scope = component
+                count = sum(1 for _ in self.iterate(dict()))
+                self.undo(0)
+                if count == 0:
+                    return 0
+                total *= count
+        finally:
+            self.scope = None
+            self.undo(0)
+            self.trail = None
+        return total
 
     def enforce_node_consistency(self):
         """
@@ -107,48 +204,80 @@ class CrosswordCreator():
         (Remove any values that are inconsistent with a variable's unary
          constraints; in this case, the length of the word.)
         """
+        index = self.crossword.index
         for var in self.domains:
-            new_domain = self.domains[var].copy()
-            for word in self.domains[var]:
-                if var.length != len(word):
-                    new_domain -= {word}
-            self.domains[var] = new_domain
+            self.domains[var] = self.domains[var].intersection(
+                index.words_of_length(var.length)
+            )
 
     def revise(self, x, y):
         revised = False
-
-        def search_in_domain(domain, index, char, disallow):
-            for word in domain:
-                if word[index] == char and word != disallow:
-                    return True
-            return False
+        if self.stats is not None:
+            self.stats.revise_calls += 1
 
         if (x, y) in self.crossword.overlaps:
-            new_domain = self.domains[x].copy()
             overlap = self.crossword.overlaps[(x, y)]
+
+            # Count how many words in y's domain have each letter at the
+            # overlapping cell, instead of scanning y's domain once per word
+            letters = dict()
+            for word in self.domains[y]:
+                letter = word[overlap[1]]
+                letters[letter] = letters.get(letter, 0) + 1
+
+            removed = set()
+            domain_y = self.domains[y]
             for i in self.domains[x]:
-                if not search_in_domain(self.domains[y], overlap[1], i[overlap[0]], i):
-                    new_domain -= {i}
-                    revised = True
-            self.domains[x] = new_domain
+                support = letters.get(i[overlap[0]], 0)
+                # The same word cannot be used for both variables
+                if i in domain_y and i[overlap[1]] == i[overlap[0]]:
+                    support -= 1
+                if support <= 0:
+                    removed.add(i)
+            if removed:
+                self.prune(x, removed)
+                revised = True
         return revised
 
+    def prune(self, var, values):
+        """
+        Remove `values` from the domain of `var`, recording them on the trail
+        if a search is in progress so that `undo` can restore them.
+        """
+        self.domains[var] -= values
+        if self.trail is not None:
+            self.trail.append((var, values))
+        if self.stats is not None:
+            self.stats.pruned += len(values)
+
+    def undo(self, mark):
+        """
+        Restore every domain value pruned since the trail had length `mark`.
+        """
+        while len(self.trail) > mark:
+            var, values = self.trail.pop()
+            self.domains[var] |= values
+
     def ac3(self, arcs=None):
-        if arcs:
-            queue = arcs
+        stats = self.stats
+        if stats is not None:
+            pruned = stats.pruned
+        if arcs is not None:
+            queue = list(arcs)
         else:
-            queue = []
-            for i in self.crossword.overlaps:
-                if self.crossword.overlaps[i]:
-                    queue.append(i)
-            while queue:
-                (x, y) = queue[-1]
-                queue = queue[:-1]
-                if self.revise(x, y):
-                    if len(self.domains[x]) == 0:
-                        return False
-                    for i in self.crossword.neighbors(x) - {y}:
+            queue = list(self.crossword.overlaps)
+        while queue:
+            (x, y) = queue.pop()
+            if self.revise(x, y):
+                if len(self.domains[x]) == 0:
+                    if stats is not None:
+                        stats.ac3_pruned.append(stats.pruned - pruned)
+                    return False
+                for i, _ in self.crossword.overlapping(x):
+                    if i != y:
                         queue.append((i, x))
+        if stats is not None:
+            stats.ac3_pruned.append(stats.pruned - pruned)
         return True
 
     def assignment_complete(self, assignment):
@@ -156,6 +285,8 @@ class CrosswordCreator():
         Return True if `assignment` is complete (i.e., assigns a value to each
         crossword variable); return False otherwise.
         """
+        if self.scope is not None:
+            return all(var in assignment for var in self.scope)
         return len(assignment) == len(self.domains)
 
     def consistent(self, assignment):
@@ -168,13 +299,11 @@ class CrosswordCreator():
         for i in assignment:
             if i.length != len(assignment[i]):
                 return False
-            for j in assignment:
-                if j == i:
+            for j, overlap in self.crossword.overlapping(i):
+                if j not in assignment:
                     continue
-                overlap = self.crossword.overlaps[(i, j)]
-                if overlap:
-                    if assignment[i][overlap[0]] != assignment[j][overlap[1]]:
-                        return False
+                if assignment[i][overlap[0]] != assignment[j][overlap[1]]:
+                    return False
         return True
 
     def order_domain_values(self, var, assignment):
@@ -187,13 +316,14 @@ class CrosswordCreator():
         domain = []
         for i in self.domains[var]:
             discarded = 0
-            for j in self.crossword.neighbors(var):
+            for j, overlap in self.crossword.overlapping(var):
                 if j not in assignment:
-                    overlap = self.crossword.overlaps[(var, j)]
                     for k in self.domains[j]:
                         if k[overlap[1]] != i[overlap[0]]:
                             discarded += 1
             domain.append((discarded, i))
+        if self.random:
+            self.random.shuffle(domain)
         domain.sort(key = lambda x: x[0])
         final = []
         for i in domain:
@@ -209,7 +339,10 @@ class CrosswordCreator():
         return values.
         """
         best = [len(self.crossword.words) + 1, 0, []]
-        for i in self.domains:
+        variables = list(self.domains if self.scope is None else self.scope)
+        if self.random:
+            self.random.shuffle(variables)
+        for i in variables:
             if i not in assignment:
                 length = self.domains[i].__len__()
                 if best[0] > length:
@@ -236,34 +369,59 @@ class CrosswordCreator():
 
         If no assignment is possible, return None.
         """
+        if self.trail is None:
+            # Called directly rather than from `search`: keep a trail of our
+            # own so the domains are restored once the search is over
+            self.trail = []
+            try:
+                return self.backtrack(assignment)
+            finally:
+                self.undo(0)
+                self.trail = None
+        for result in self.iterate(assignment):
+            return result
+        return None
+
+    def iterate(self, assignment):
+        """
+        Generate every complete assignment extending `assignment`, in the
+        order backtracking search finds them. The same (mutated) dict is
+        yielded each time, so copy it to keep a solution around.
+        """
+        self.nodes += 1
+        if self.node_limit is not None and self.nodes > self.node_limit:
+            raise SearchInterrupted
+        if (self.stop is not None
+                and self.nodes % CrosswordCreator.STOP_CHECK_INTERVAL == 0
+                and self.stop()):
+            raise SearchInterrupted
+        if self.stats is not None:
+            depth = len(assignment)
+            self.stats.depths[depth] = self.stats.depths.get(depth, 0) + 1
         if self.assignment_complete(assignment):
-            return assignment
+            yield assignment
+            return
         var = self.select_unassigned_variable(assignment)
         domain_values = self.order_domain_values(var, assignment)
-        inferences = []
-        domains_backup = deepcopy(self.domains)
         for i in domain_values:
+            mark = len(self.trail)
             assignment[var] = i
-            arcs = []
-            self.domains[var] = {i}
-            for j in self.crossword.neighbors(var):
-                arcs.append(self.crossword.overlaps[(j, var)])
-            if not self.ac3(arcs=arcs):
-                continue
-            inferences = self.infer(assignment)
-            if self.consistent(assignment):
-                result = self.backtrack(assignment)
-                if result:
-                    return result
-            for j in inferences:
-                assignment.pop(j)
-        assignment.pop(var)
-        self.domains = domains_backup
-        return None
+            self.prune(var, self.domains[var] - {i})
+            arcs = [(j, var) for j, _ in self.crossword.overlapping(var)]
+            if self.ac3(arcs=arcs):
+                inferences = self.infer(assignment)
+                if self.consistent(assignment):
+                    yield from self.iterate(assignment)
+                for j in inferences:
+                    assignment.pop(j)
+            self.undo(mark)
+            if self.stats is not None:
+                self.stats.backtracks += 1
+        assignment.pop(var, None)
 
     def infer(self, assignment):
         inferred = []
-        for i in self.domains:
+        for i in self.domains if self.scope is None else self.scope:
             if i in assignment:
                 continue
             val = self.domains[i]
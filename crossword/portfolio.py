@@ -0,0 +1,129 @@
+import multiprocessing
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from crossword import *
+from generate import CrosswordCreator
+
+# Set in every worker process by `init_worker`; once any worker finds a
+# solution (or proves there is none) the others poll it and give up
+stop_event = None
+
+
+def luby(i):
+    """
+    Return the ith term (starting from 1) of the Luby sequence
+    1, 1, 2, 1, 1, 2, 4, 1, 1, 2, 1, 1, 2, 4, 8, ...
+    """
+    k = 1
+    while (1 << k) - 1 < i:
+        k += 1
+    while (1 << k) - 1 != i:
+        i -= (1 << (k - 1)) - 1
+        k = 1
+        while (1 << k) - 1 < i:
+            k += 1
+    return 1 << (k - 1)
+
+
+def init_worker(event):
+    global stop_event
+    stop_event = event
+
+
+def run_worker(crossword, seed, restarts, node_budget):
+    """
+    Solve `crossword` with one member of the portfolio.
+
+    A seed of None runs the plain deterministic search; any other seed
+    randomizes variable and value ordering. With `restarts`, a randomized
+    search is restarted with a fresh ordering every time it expands
+    `node_budget * luby(i)` nodes on its ith run. The deterministic search
+    is never restarted, since it would only repeat the same ordering.
+
+    Return a tuple (assignment, complete) where `complete` is True if the
+    search ran to the end, i.e. a None assignment proves there is no
+    solution.
+    """
+    creator = CrosswordCreator(crossword, seed=seed)
+    if stop_event is not None:
+        creator.stop = stop_event.is_set
+    creator.enforce_node_consistency()
+    creator.ac3()
+
+    restarts = restarts and seed is not None
+    run = 1
+    while True:
+        node_limit = node_budget * luby(run) if restarts else None
+        assignment = creator.search(node_limit)
+        if not creator.interrupted:
+            return assignment, True
+        if stop_event is not None and stop_event.is_set():
+            return None, False
+        run += 1
+
+
+def solve_portfolio(crossword, workers=None, restarts=False,
+                    node_budget=1000, seed=0):
+    """
+    Solve `crossword` by racing several differently ordered searches in a
+    process pool, returning the first complete assignment found (or None if
+    a search proves that there is none). The remaining searches are told to
+    stop as soon as one of them finishes.
+
+    The first worker runs the deterministic search to completion, the
+    others are randomized with seeds `seed + 1`, `seed + 2`, ... and, with
+    `restarts`, restarted on a Luby schedule of `node_budget` nodes.
+    """
+    workers = workers or os.cpu_count() or 1
+    seeds = [None] + [seed + k for k in range(1, workers)]
+
+    event = multiprocessing.Event()
+    executor = ProcessPoolExecutor(
+        max_workers=workers, initializer=init_worker, initargs=(event,)
+    )
+    try:
+        pending = {
+            executor.submit(run_worker, crossword, s, restarts, node_budget)
+            for s in seeds
+        }
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                assignment, complete = future.result()
+                if assignment is not None or complete:
+                    return assignment
+        return None
+    finally:
+        event.set()
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def main():
+    # Check usage
+    if len(sys.argv) not in [3, 4, 5]:
+        sys.exit("Usage: python portfolio.py structure words [output] [workers]")
+
+    # Parse command-line arguments
+    structure = sys.argv[1]
+    words = sys.argv[2]
+    output = sys.argv[3] if len(sys.argv) >= 4 else None
+    workers = int(sys.argv[4]) if len(sys.argv) == 5 else None
+
+    # Generate crossword
+    crossword = Crossword(structure, words)
+    assignment = solve_portfolio(crossword, workers=workers, restarts=True)
+
+    # Print result
+    creator = CrosswordCreator(crossword)
+    if assignment is None:
+        print("No solution.")
+    else:
+        creator.print(assignment)
+        if output:
+            creator.save(assignment, output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+import string
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+FONT_FILE = "assets/fonts/OpenSans-Regular.ttf"
+
+
+class Renderer():
+
+    # Every character a word can contain (words2.txt has hyphenated words
+    # and contractions)
+    LETTERS = string.ascii_uppercase + "-'"
+
+    def __init__(self, cell_size=100, font_file=FONT_FILE, workers=2):
+        """
+        Create a crossword renderer drawing `cell_size` pixel cells.
+
+        The font is opened once, and each letter is rasterized once into a
+        glyph atlas, so rendering a grid only copies arrays.
+        A small cell size gives a thumbnail at the same proportions.
+        """
+        self.cell_size = cell_size
+        self.cell_border = max(1, round(cell_size / 50))
+        self.interior_size = cell_size - 2 * self.cell_border
+        self.font = ImageFont.truetype(font_file, round(cell_size * 0.8))
+        self.atlas = self.rasterize()
+        self.workers = workers
+        self.executor = None
+
+    def rasterize(self):
+        """
+        Return an array of shape (letters, interior, interior) holding how
+        dark each pixel of each letter is, from 0 (paper) to 255 (ink).
+        """
+        size = self.interior_size
+        atlas = np.zeros((len(Renderer.LETTERS), size, size), dtype=np.uint8)
+        for k, letter in enumerate(Renderer.LETTERS):
+            glyph = Image.new("L", (size, size), 0)
+            draw = ImageDraw.Draw(glyph)
+            left, top, right, bottom = draw.textbbox(
+                (0, 0), letter, font=self.font
+            )
+            draw.text(
+                ((size - (right - left)) / 2 - left,
+                 (size - (bottom - top)) / 2 - top),
+                letter, fill=255, font=self.font
+            )
+            atlas[k] = np.asarray(glyph)
+        return atlas
+
+    def render(self, structure, letters):
+        """
+        Return an RGBA array of the crossword with the given `structure`
+        (2D list of booleans) filled in with `letters` (2D list of letters
+        or None, as returned by `CrosswordCreator.letter_grid`).
+
+        Raises ValueError for a letter the atlas has no glyph for.
+        """
+        height, width = len(structure), len(structure[0])
+        size, border = self.cell_size, self.cell_border
+
+        canvas = np.zeros((height * size, width * size, 4), dtype=np.uint8)
+        canvas[..., 3] = 255
+
+        # View the canvas as a (height, width, size, size, 4) grid of cells
+        cells = canvas.reshape(height, size, width, size, 4).swapaxes(1, 2)
+        interior = (slice(border, size - border), slice(border, size - border))
+
+        open_cells = np.array(structure, dtype=bool)
+        cells[(open_cells,) + interior + (slice(0, 3),)] = 255
+
+        index = np.array([
+            [Renderer.LETTERS.find(letter) if letter else -1 for letter in row]
+            for row in letters
+        ], dtype=np.intp)
+        unknown = {
+            letter for row in letters for letter in row
+            if letter and Renderer.LETTERS.find(letter) < 0
+        }
+        if unknown:
+            raise ValueError(
+                f"cannot render {''.join(sorted(unknown))!r}"
+            )
+        filled = open_cells & (index >= 0)
+        if filled.any():
+            glyphs = 255 - self.atlas[index[filled]]
+            cells[(filled,) + interior + (slice(0, 3),)] = glyphs[..., None]
+        return canvas
+
+    def image(self, structure, letters):
+        """Return the rendered crossword as a PIL image."""
+        return Image.fromarray(self.render(structure, letters), "RGBA")
+
+    def save(self, structure, letters, filename):
+        """Render the crossword and write it to `filename`."""
+        self.image(structure, letters).save(filename)
+
+    def save_async(self, structure, letters, filename):
+        """
+        Render the crossword and write it to `filename` from a background
+        thread, returning a Future. Call `close` to wait for pending writes.
+        """
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.workers)
+        canvas = self.render(structure, letters)
+        return self.executor.submit(
+            lambda: Image.fromarray(canvas, "RGBA").save(filename)
+        )
+
+    def close(self):
+        """Wait for every pending background write to finish."""
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+# Renderers already built by this process, keyed by cell size
+renderers = dict()
+
+
+def get_renderer(cell_size=100):
+    """Return a shared renderer for `cell_size` pixel cells."""
+    if cell_size not in renderers:
+        renderers[cell_size] = Renderer(cell_size)
+    return renderers[cell_size]
+
+
+def close_renderers():
+    """Wait for the background writes of every shared renderer."""
+    for renderer in renderers.values():
+        renderer.close()
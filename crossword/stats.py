@@ -0,0 +1,64 @@
+import json
+
+
+class SearchStats():
+
+    PHASES = ["enforce_node_consistency", "ac3", "backtrack"]
+
+    def __init__(self):
+        """
+        Create empty counters for one run of the crossword CSP solver.
+        """
+        self.nodes = 0
+        self.backtracks = 0
+        self.revise_calls = 0
+
+        # Values removed from domains, in total and by each call to `ac3`
+        self.pruned = 0
+        self.ac3_pruned = []
+
+        # Number of nodes expanded at each depth (number of assigned
+        # variables, including inferred ones)
+        self.depths = dict()
+
+        # Seconds spent in each phase of `solve`
+        self.times = {phase: 0.0 for phase in SearchStats.PHASES}
+
+    def to_dict(self):
+        """Return the statistics as a JSON serializable dict."""
+        return {
+            "nodes": self.nodes,
+            "backtracks": self.backtracks,
+            "revise_calls": self.revise_calls,
+            "pruned": self.pruned,
+            "ac3_runs": len(self.ac3_pruned),
+            "ac3_pruned": self.ac3_pruned,
+            "depths": {
+                str(depth): count
+                for depth, count in sorted(self.depths.items())
+            },
+            "times": self.times,
+        }
+
+    def dumps(self, **kwargs):
+        """Return the statistics as a JSON string."""
+        return json.dumps(self.to_dict(), **kwargs)
+
+    def dump(self, filename, **kwargs):
+        """Write the statistics as JSON to `filename`."""
+        with open(filename, "w") as f:
+            json.dump(self.to_dict(), f, **kwargs)
+
+    def __str__(self):
+        lines = [
+            f"nodes: {self.nodes}",
+            f"backtracks: {self.backtracks}",
+            f"revise calls: {self.revise_calls}",
+            f"values pruned: {self.pruned} "
+            f"over {len(self.ac3_pruned)} AC-3 runs",
+        ]
+        for phase in SearchStats.PHASES:
+            lines.append(f"{phase}: {self.times[phase] * 1000:.1f} ms")
+        for depth, count in sorted(self.depths.items()):
+            lines.append(f"depth {depth}: {count} nodes")
+        return "\n".join(lines)
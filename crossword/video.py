@@ -1,9 +1,29 @@
-import os
 import time
 
+from batch import solve_batch
+
 combinations = [(0,0),(0,1),(1,1),(2,2),(0,2)]
 
+puzzles = [
+	("data/structure{}.txt".format(i[0]), "data/words{}.txt".format(i[1]), "images/{0}_{1}.png".format(i[0], i[1]))
+	for i in combinations
+]
+
+results = solve_batch(puzzles)
 for i in combinations:
 	print("Running structure {} with words {}".format(i[0], i[1]))
-	os.system("python generate.py data/structure{0}.txt data/words{1}.txt images/{0}_{1}.png".format(i[0], i[1]))
-	time.sleep(0.5)	
+	result = next(results)
+	if result["error"]:
+		print(result["error"])
+	elif not result["solved"]:
+		print("No solution.")
+	else:
+		grid = result["grid"]
+		print()
+		print("_" * len(grid[0]) * 2)
+		for row in grid:
+			for letter in row:
+				print(letter or "■", end="|")
+			print()
+		print("-" * len(grid[0]) * 2)
+	time.sleep(0.5)
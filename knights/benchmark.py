@@ -0,0 +1,103 @@
+import os
+import random
+import sys
+import tempfile
+import time
+
+from logic import *
+from parsing import load_knowledge, save_knowledge
+from sat import entails
+import puzzle
+
+# Largest number of symbols still run through the recursive enumerator
+TRUTH_TABLE_LIMIT = 14
+
+CHECKS = [
+    ("truth table", truth_table_check),
+    ("bitmask", bitmask_check),
+    ("sat", entails),
+]
+
+
+def random_3sat(n, ratio=4.26, seed=0):
+    """
+    Return a random 3-SAT knowledge base over `n` symbols with
+    `ratio * n` clauses, and its symbols.
+    """
+    rng = random.Random(seed)
+    symbols = [Symbol(f"x{i}") for i in range(n)]
+    clauses = []
+    for _ in range(round(ratio * n)):
+        clauses.append(Or(*[
+            symbol if rng.random() < 0.5 else Not(symbol)
+            for symbol in rng.sample(symbols, 3)
+        ]))
+    return And(*clauses), symbols
+
+
+def timed(check, knowledge, queries):
+    """Return the seconds `check` takes to answer every query."""
+    start = time.perf_counter()
+    for query in queries:
+        check(knowledge, query)
+    return time.perf_counter() - start
+
+
+def report(name, knowledge, queries):
+    n = len(knowledge.symbols().union(*[q.symbols() for q in queries]))
+    row = f"{name:<16}{n:>10}"
+    for check_name, check in CHECKS:
+        if check is truth_table_check and n > TRUTH_TABLE_LIMIT:
+            row += f"{'-':>16}"
+            continue
+        row += f"{timed(check, knowledge, queries) * 1000:>16.2f}"
+    print(row)
+
+
+def parse_throughput(clauses=10 ** 5):
+    """
+    Write a random 3-SAT knowledge base with `clauses` clauses to a file,
+    and return (seconds to load it back, clauses per second).
+    """
+    knowledge, _ = random_3sat(clauses // 4, ratio=4, seed=clauses)
+    fd, filename = tempfile.mkstemp(suffix=".txt")
+    os.close(fd)
+    try:
+        save_knowledge(knowledge, filename)
+        start = time.perf_counter()
+        loaded = load_knowledge(filename)
+        seconds = time.perf_counter() - start
+    finally:
+        os.remove(filename)
+    assert loaded is knowledge
+    return seconds, len(knowledge.conjuncts) / seconds
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python benchmark.py [max symbols]")
+    largest = int(sys.argv[1]) if len(sys.argv) == 2 else 24
+
+    print(f"{'knowledge':<16}{'symbols':>10}"
+          + "".join(f"{name + ' ms':>16}" for name, _ in CHECKS))
+    symbols = [
+        puzzle.AKnight, puzzle.AKnave, puzzle.BKnight,
+        puzzle.BKnave, puzzle.CKnight, puzzle.CKnave
+    ]
+    for k, knowledge in enumerate([
+        puzzle.knowledge0, puzzle.knowledge1,
+        puzzle.knowledge2, puzzle.knowledge3
+    ]):
+        report(f"puzzle {k}", knowledge, symbols)
+
+    for n in range(8, largest + 1, 4):
+        knowledge, symbols = random_3sat(n, seed=n)
+        report(f"3-sat {n}", knowledge, symbols)
+
+    seconds, rate = parse_throughput()
+    print(f"\nparsed 100000 clauses in {seconds:.2f} s "
+          f"({rate:,.0f} clauses/s)")
+
+
+if __name__ == "__main__":
+    main()
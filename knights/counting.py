@@ -0,0 +1,298 @@
+import itertools
+
+from logic import *
+from sat import CNF
+
+
+def compile_clauses(sentence, symbols=None):
+    """
+    Compile `sentence` to CNF, also declaring every name in `symbols`, and
+    return the CNF and its clauses as a list of frozensets of literals.
+
+    Tseitin variables are fully defined by the symbols, so models of the
+    clauses and models of the sentence correspond one to one.
+    """
+    cnf = CNF()
+    for name in sorted(symbols or ()):
+        cnf.variable(name)
+    cnf.add(sentence)
+    clauses = []
+    for clause in cnf.clauses:
+        clause = frozenset(clause)
+        if not any(-literal in clause for literal in clause):
+            clauses.append(clause)
+    return cnf, clauses
+
+
+def condition(clauses, literal):
+    """
+    Return the clauses simplified by making `literal` true, or None if that
+    falsifies one of them.
+    """
+    result = []
+    for clause in clauses:
+        if literal in clause:
+            continue
+        if -literal in clause:
+            clause = clause - {-literal}
+            if not clause:
+                return None
+        result.append(clause)
+    return result
+
+
+def propagate(clauses, assigned):
+    """
+    Apply unit propagation, appending every literal it sets to `assigned`.
+    Return the simplified clauses, or None on a conflict (including an
+    empty clause, such as the one an empty disjunction compiles to).
+    """
+    if clauses is not None and not all(clauses):
+        return None
+    while clauses is not None:
+        unit = next((c for c in clauses if len(c) == 1), None)
+        if unit is None:
+            break
+        literal = next(iter(unit))
+        assigned.append(literal)
+        clauses = condition(clauses, literal)
+    return clauses
+
+
+def components(clauses):
+    """
+    Split clauses into groups that share no variables, returning a list of
+    (clauses, variables) pairs.
+    """
+    parent = dict()
+
+    def find(var):
+        while parent[var] != var:
+            parent[var] = parent[parent[var]]
+            var = parent[var]
+        return var
+
+    for clause in clauses:
+        variables = [abs(literal) for literal in clause]
+        for var in variables:
+            parent.setdefault(var, var)
+        root = find(variables[0])
+        for var in variables[1:]:
+            parent[find(var)] = root
+
+    groups = dict()
+    for clause in clauses:
+        root = find(abs(next(iter(clause))))
+        group = groups.setdefault(root, ([], set()))
+        group[0].append(clause)
+        group[1].update(abs(literal) for literal in clause)
+    return list(groups.values())
+
+
+def branch_variable(clauses):
+    """Return the variable occurring in the most clauses."""
+    occurrences = dict()
+    for clause in clauses:
+        for literal in clause:
+            occurrences[abs(literal)] = occurrences.get(abs(literal), 0) + 1
+    return max(occurrences, key=occurrences.get)
+
+
+class Counter():
+
+    def __init__(self):
+        """
+        Count models of clause sets by DPLL-style branching, splitting
+        independent components apart and caching the count of every
+        component seen so far.
+        """
+        self.cache = dict()
+
+    def count(self, clauses, variables):
+        """Return the number of assignments to `variables` satisfying them."""
+        assigned = []
+        clauses = propagate(clauses, assigned)
+        if clauses is None:
+            return 0
+        free = len(variables) - len(assigned)
+        total = 1
+        for group, group_variables in components(clauses):
+            free -= len(group_variables)
+            total *= self.count_component(group, group_variables)
+            if not total:
+                return 0
+        return total << free
+
+    def count_component(self, clauses, variables):
+        key = frozenset(clauses)
+        if key not in self.cache:
+            var = branch_variable(clauses)
+            rest = variables - {var}
+            count = 0
+            for literal in (var, -var):
+                conditioned = condition(clauses, literal)
+                if conditioned is not None:
+                    count += self.count(conditioned, rest)
+            self.cache[key] = count
+        return self.cache[key]
+
+
+class DDNNF():
+
+    TRUE = ("true",)
+    FALSE = ("false",)
+
+    def __init__(self, cnf, root, variables):
+        """
+        A formula in deterministic decomposable negation normal form.
+
+        Nodes are tuples: `TRUE`, `FALSE`, ("literal", l), ("and", children)
+        whose children share no variables, and ("or", children) whose
+        children are mutually exclusive. Equal components compile to the
+        same node object, so the formula is a DAG rather than a tree.
+        """
+        self.cnf = cnf
+        self.root = root
+        self.variables = variables
+
+    @classmethod
+    def compile(cls, sentence, symbols=None):
+        """Compile `sentence` (over at least `symbols`) to d-DNNF."""
+        cnf, clauses = compile_clauses(sentence, symbols)
+        cache = dict()
+
+        def compile_clauses_(clauses):
+            assigned = []
+            clauses = propagate(clauses, assigned)
+            if clauses is None:
+                return DDNNF.FALSE
+            children = [("literal", literal) for literal in assigned]
+            for group, _ in components(clauses):
+                children.append(compile_component(group))
+            if not children:
+                return DDNNF.TRUE
+            if len(children) == 1:
+                return children[0]
+            return ("and", tuple(children))
+
+        def compile_component(clauses):
+            key = frozenset(clauses)
+            if key not in cache:
+                var = branch_variable(clauses)
+                branches = []
+                for literal in (var, -var):
+                    conditioned = condition(clauses, literal)
+                    if conditioned is not None:
+                        node = compile_clauses_(conditioned)
+                        branches.append(("and", (("literal", literal), node)))
+                if not branches:
+                    cache[key] = DDNNF.FALSE
+                elif len(branches) == 1:
+                    cache[key] = branches[0]
+                else:
+                    cache[key] = ("or", tuple(branches))
+            return cache[key]
+
+        root = compile_clauses_(clauses)
+        return cls(cnf, root, frozenset(range(1, cnf.num_variables + 1)))
+
+    def count(self):
+        """
+        Return the number of models, counting in one pass over the DAG and
+        scaling every branch by the variables it leaves unmentioned.
+        """
+        memo = dict()
+
+        def visit(node):
+            """Return (models over mentioned variables, mentioned variables)."""
+            if id(node) in memo:
+                return memo[id(node)]
+            kind = node[0]
+            if kind == "true":
+                result = (1, frozenset())
+            elif kind == "false":
+                result = (0, frozenset())
+            elif kind == "literal":
+                result = (1, frozenset([abs(node[1])]))
+            elif kind == "and":
+                count, mentioned = 1, frozenset()
+                for child in node[1]:
+                    child_count, child_mentioned = visit(child)
+                    count *= child_count
+                    mentioned |= child_mentioned
+                result = (count, mentioned)
+            else:
+                visited = [visit(child) for child in node[1]]
+                mentioned = frozenset().union(*[m for _, m in visited])
+                count = sum(
+                    c << (len(mentioned) - len(m)) for c, m in visited
+                )
+                result = (count, mentioned)
+            memo[id(node)] = result
+            return result
+
+        count, mentioned = visit(self.root)
+        if not count:
+            return 0
+        return count << (len(self.variables) - len(mentioned))
+
+
+def count_models(sentence, symbols=None, ddnnf=False):
+    """
+    Return the number of models of `sentence` over its symbols together
+    with any extra symbol names in `symbols`.
+
+    With `ddnnf`, the sentence is first compiled to d-DNNF (see `DDNNF`) and
+    the models are counted on the compiled formula.
+    """
+    if ddnnf:
+        return DDNNF.compile(sentence, symbols).count()
+    cnf, clauses = compile_clauses(sentence, symbols)
+    variables = frozenset(range(1, cnf.num_variables + 1))
+    return Counter().count(clauses, variables)
+
+
+def iterate_models(sentence, symbols=None):
+    """
+    Lazily generate every model of `sentence` (over its symbols together
+    with any extra symbol names in `symbols`) as a dict from symbol name to
+    boolean, building one dict per model.
+    """
+    cnf, clauses = compile_clauses(sentence, symbols)
+    names = cnf.variables
+
+    def search(clauses, assignment):
+        assigned = []
+        clauses = propagate(clauses, assigned)
+        if clauses is None:
+            return
+        for literal in assigned:
+            assignment[abs(literal)] = literal > 0
+        try:
+            if clauses:
+                var = branch_variable(clauses)
+                for literal in (var, -var):
+                    conditioned = condition(clauses, literal)
+                    if conditioned is not None:
+                        assignment[var] = literal > 0
+                        yield from search(conditioned, assignment)
+                        del assignment[var]
+                return
+
+            # Every clause holds: unset symbols can take either value
+            free = [
+                name for name, var in names.items() if var not in assignment
+            ]
+            model = {
+                name: assignment[var] for name, var in names.items()
+                if var in assignment
+            }
+            for values in itertools.product([True, False], repeat=len(free)):
+                result = dict(model)
+                result.update(zip(free, values))
+                yield result
+        finally:
+            for literal in assigned:
+                del assignment[abs(literal)]
+
+    yield from search(clauses, dict())
@@ -1,8 +1,48 @@
 import itertools
+import multiprocessing
+import os
+import weakref
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 
 class Sentence():
 
+    __slots__ = ("_hash", "_symbols", "__weakref__")
+
+    # Every live sentence, keyed by its class and children, so that building
+    # the same formula twice returns the very same object (hash-consing)
+    _interned = weakref.WeakValueDictionary()
+
+    @staticmethod
+    def intern(cls, key, symbols, **fields):
+        """
+        Return the unique sentence of class `cls` identified by `key`,
+        creating it with the given field values and symbol set if needed.
+        """
+        key = (cls,) + key
+        sentence = Sentence._interned.get(key)
+        if sentence is None:
+            sentence = object.__new__(cls)
+            for name, value in fields.items():
+                object.__setattr__(sentence, name, value)
+            object.__setattr__(sentence, "_hash", hash(key))
+            object.__setattr__(sentence, "_symbols", frozenset(symbols))
+            Sentence._interned[key] = sentence
+        return sentence
+
+    def __setattr__(self, name, value):
+        raise AttributeError("logical sentences are immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("logical sentences are immutable")
+
+    def __eq__(self, other):
+        # Equal sentences are interned into a single object
+        return self is other
+
+    def __hash__(self):
+        return self._hash
+
     def evaluate(self, model):
         """Evaluates the logical sentence."""
         raise Exception("nothing to evaluate")
@@ -12,8 +52,8 @@ class Sentence():
         return ""
 
     def symbols(self):
-        """Returns a set of all symbols in the logical sentence."""
-        return set()
+        """Returns a (frozen) set of all symbols in the logical sentence."""
+        return self._symbols
 
     @classmethod
     def validate(cls, sentence):
@@ -44,14 +84,13 @@ class Sentence():
 
 class Symbol(Sentence):
 
-    def __init__(self, name):
-        self.name = name
+    __slots__ = ("name",)
 
-    def __eq__(self, other):
-        return isinstance(other, Symbol) and self.name == other.name
+    def __new__(cls, name):
+        return Sentence.intern(cls, (name,), (name,), name=name)
 
-    def __hash__(self):
-        return hash(("symbol", self.name))
+    def __reduce__(self):
+        return (Symbol, (self.name,))
 
     def __repr__(self):
         return self.name
@@ -65,20 +104,19 @@ class Symbol(Sentence):
     def formula(self):
         return self.name
 
-    def symbols(self):
-        return {self.name}
-
 
 class Not(Sentence):
-    def __init__(self, operand):
-        Sentence.validate(operand)
-        self.operand = operand
 
-    def __eq__(self, other):
-        return isinstance(other, Not) and self.operand == other.operand
+    __slots__ = ("operand",)
 
-    def __hash__(self):
-        return hash(("not", hash(self.operand)))
+    def __new__(cls, operand):
+        Sentence.validate(operand)
+        return Sentence.intern(
+            cls, (operand,), operand.symbols(), operand=operand
+        )
+
+    def __reduce__(self):
+        return (Not, (self.operand,))
 
     def __repr__(self):
         return f"Not({self.operand})"
@@ -89,24 +127,23 @@ class Not(Sentence):
     def formula(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
-    def symbols(self):
-        return self.operand.symbols()
-
 
 class And(Sentence):
-    def __init__(self, *conjuncts):
-        for conjunct in conjuncts:
-            Sentence.validate(conjunct)
-        self.conjuncts = list(conjuncts)
 
-    def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
+    __slots__ = ("conjuncts",)
 
-    def __hash__(self):
-        return hash(
-            ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
+    def __new__(cls, *conjuncts):
+        for conjunct in conjuncts:
+            Sentence.validate(conjunct)
+        return Sentence.intern(
+            cls, conjuncts,
+            frozenset().union(*[c.symbols() for c in conjuncts]),
+            conjuncts=conjuncts
         )
 
+    def __reduce__(self):
+        return (And, self.conjuncts)
+
     def __repr__(self):
         conjunctions = ", ".join(
             [str(conjunct) for conjunct in self.conjuncts]
@@ -114,8 +151,11 @@ class And(Sentence):
         return f"And({conjunctions})"
 
     def add(self, conjunct):
-        Sentence.validate(conjunct)
-        self.conjuncts.append(conjunct)
+        """
+        Return a new conjunction with `conjunct` added at the end
+        (sentences are immutable, so this one is left unchanged).
+        """
+        return And(*self.conjuncts, conjunct)
 
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
@@ -126,24 +166,23 @@ class And(Sentence):
         return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
                            for conjunct in self.conjuncts])
 
-    def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
-
 
 class Or(Sentence):
-    def __init__(self, *disjuncts):
-        for disjunct in disjuncts:
-            Sentence.validate(disjunct)
-        self.disjuncts = list(disjuncts)
 
-    def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
+    __slots__ = ("disjuncts",)
 
-    def __hash__(self):
-        return hash(
-            ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
+    def __new__(cls, *disjuncts):
+        for disjunct in disjuncts:
+            Sentence.validate(disjunct)
+        return Sentence.intern(
+            cls, disjuncts,
+            frozenset().union(*[d.symbols() for d in disjuncts]),
+            disjuncts=disjuncts
         )
 
+    def __reduce__(self):
+        return (Or, self.disjuncts)
+
     def __repr__(self):
         disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
         return f"Or({disjuncts})"
@@ -157,24 +196,22 @@ class Or(Sentence):
         return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
                             for disjunct in self.disjuncts])
 
-    def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
-
 
 class Implication(Sentence):
-    def __init__(self, antecedent, consequent):
+
+    __slots__ = ("antecedent", "consequent")
+
+    def __new__(cls, antecedent, consequent):
         Sentence.validate(antecedent)
         Sentence.validate(consequent)
-        self.antecedent = antecedent
-        self.consequent = consequent
-
-    def __eq__(self, other):
-        return (isinstance(other, Implication)
-                and self.antecedent == other.antecedent
-                and self.consequent == other.consequent)
+        return Sentence.intern(
+            cls, (antecedent, consequent),
+            antecedent.symbols() | consequent.symbols(),
+            antecedent=antecedent, consequent=consequent
+        )
 
-    def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
+    def __reduce__(self):
+        return (Implication, (self.antecedent, self.consequent))
 
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
@@ -188,24 +225,21 @@ class Implication(Sentence):
         consequent = Sentence.parenthesize(self.consequent.formula())
         return f"{antecedent} => {consequent}"
 
-    def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
-
 
 class Biconditional(Sentence):
-    def __init__(self, left, right):
+
+    __slots__ = ("left", "right")
+
+    def __new__(cls, left, right):
         Sentence.validate(left)
         Sentence.validate(right)
-        self.left = left
-        self.right = right
-
-    def __eq__(self, other):
-        return (isinstance(other, Biconditional)
-                and self.left == other.left
-                and self.right == other.right)
+        return Sentence.intern(
+            cls, (left, right), left.symbols() | right.symbols(),
+            left=left, right=right
+        )
 
-    def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
+    def __reduce__(self):
+        return (Biconditional, (self.left, self.right))
 
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
@@ -217,16 +251,133 @@ class Biconditional(Sentence):
                     and not self.right.evaluate(model)))
 
     def formula(self):
-        left = Sentence.parenthesize(str(self.left))
-        right = Sentence.parenthesize(str(self.right))
+        left = Sentence.parenthesize(self.left.formula())
+        right = Sentence.parenthesize(self.right.formula())
         return f"{left} <=> {right}"
 
-    def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
+
+# Largest number of symbols for which model_check evaluates the whole truth
+# table at once; bigger knowledge bases go to the SAT solver instead
+BITMASK_LIMIT = 12
 
 
 def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
+    """
+    Checks if knowledge base entails query.
+
+    Small problems are decided by evaluating the whole truth table at once
+    with bitmasks; larger ones by checking that knowledge ∧ ¬query is
+    unsatisfiable with a DPLL SAT solver.
+    """
+    symbols = knowledge.symbols() | query.symbols()
+    if len(symbols) <= BITMASK_LIMIT:
+        return bitmask_check(knowledge, query, symbols)
+    from sat import entails
+    return entails(knowledge, query)
+
+
+def model_check_all(knowledge, queries):
+    """
+    Checks which of `queries` the knowledge base entails, returning a list
+    of booleans. The knowledge base is only evaluated (or compiled for the
+    SAT solver) once, however many queries there are.
+    """
+    queries = list(queries)
+    symbols = knowledge.symbols().union(*[q.symbols() for q in queries])
+    if len(symbols) <= BITMASK_LIMIT:
+        masks, full = symbol_masks(sorted(symbols))
+        cache = dict()
+        models = truth_table(knowledge, masks, full, cache)
+        return [
+            models & ~truth_table(query, masks, full, cache) == 0
+            for query in queries
+        ]
+    from sat import entails_all
+    return entails_all(knowledge, queries)
+
+
+def symbol_masks(symbols):
+    """
+    Number the 2^n models over `symbols` (a list of names) from 0 to 2^n - 1,
+    where symbol i is true in model m if bit i of m is set. Return a dict
+    mapping each name to the bitmask of models in which it is true, and the
+    bitmask of all models.
+    """
+    size = 1 << len(symbols)
+    masks = dict()
+    for i, name in enumerate(symbols):
+        period = 1 << i
+        mask = ((1 << period) - 1) << period
+        length = period << 1
+        while length < size:
+            mask |= mask << length
+            length <<= 1
+        masks[name] = mask
+    return masks, (1 << size) - 1
+
+
+def truth_table(sentence, masks, full, cache=None):
+    """
+    Return the bitmask of the models (numbered as in `symbol_masks`) in
+    which `sentence` is true, evaluating each node once for every model
+    with integer bit operations.
+    """
+    if cache is None:
+        cache = dict()
+    key = id(sentence)
+    if key in cache:
+        return cache[key]
+
+    def table(child):
+        return truth_table(child, masks, full, cache)
+
+    if isinstance(sentence, Symbol):
+        try:
+            result = masks[sentence.name]
+        except KeyError:
+            raise Exception(f"variable {sentence.name} not in model")
+    elif isinstance(sentence, Not):
+        result = full ^ table(sentence.operand)
+    elif isinstance(sentence, And):
+        result = full
+        for conjunct in sentence.conjuncts:
+            result &= table(conjunct)
+            if not result:
+                break
+    elif isinstance(sentence, Or):
+        result = 0
+        for disjunct in sentence.disjuncts:
+            result |= table(disjunct)
+            if result == full:
+                break
+    elif isinstance(sentence, Implication):
+        result = (full ^ table(sentence.antecedent)) | table(sentence.consequent)
+    elif isinstance(sentence, Biconditional):
+        result = full ^ (table(sentence.left) ^ table(sentence.right))
+    else:
+        raise TypeError(f"cannot evaluate {type(sentence).__name__}")
+    cache[key] = result
+    return result
+
+
+def bitmask_check(knowledge, query, symbols=None):
+    """
+    Checks if knowledge base entails query, by checking that no model of
+    the truth table makes knowledge true and query false.
+    """
+    if symbols is None:
+        symbols = knowledge.symbols() | query.symbols()
+    masks, full = symbol_masks(sorted(symbols))
+    cache = dict()
+    knowledge = truth_table(knowledge, masks, full, cache)
+    query = truth_table(query, masks, full, cache)
+    return knowledge & ~query == 0
+
+
+def truth_table_check(knowledge, query):
+    """
+    Checks if knowledge base entails query, by enumerating every model.
+    """
 
     def check_all(knowledge, query, symbols, model):
         """Checks if knowledge base entails query, given a particular model."""
@@ -257,7 +408,76 @@ def model_check(knowledge, query):
                     check_all(knowledge, query, remaining, model_false))
 
     # Get all symbols in both knowledge and query
-    symbols = set.union(knowledge.symbols(), query.symbols())
+    symbols = set(knowledge.symbols() | query.symbols())
 
     # Check that knowledge entails query
     return check_all(knowledge, query, symbols, dict())
+
+
+# Set in every worker process of `parallel_model_check`; once any partition
+# has a counter-model, the other workers poll it and give up
+stop_event = None
+
+# How many models a worker checks between two polls of `stop_event`
+STOP_CHECK_INTERVAL = 1024
+
+
+def init_worker(event):
+    global stop_event
+    stop_event = event
+
+
+def check_partition(knowledge, query, symbols, model):
+    """
+    Checks if knowledge base entails query in every model extending
+    `model` (which fixes the partition's leading symbols) with values for
+    `symbols`. Returns None if told to stop before finishing.
+    """
+    for count, values in enumerate(
+        itertools.product([True, False], repeat=len(symbols))
+    ):
+        if (stop_event is not None and count % STOP_CHECK_INTERVAL == 0
+                and stop_event.is_set()):
+            return None
+        model.update(zip(symbols, values))
+        if knowledge.evaluate(model) and not query.evaluate(model):
+            return False
+    return True
+
+
+def parallel_model_check(knowledge, query, split=None, workers=None):
+    """
+    Checks if knowledge base entails query by enumerating every model, like
+    `truth_table_check`, but spread over a process pool.
+
+    The models are partitioned on the values of the first `split` symbols
+    (by default enough for about four partitions per worker), and each
+    partition is checked in a worker. As soon as one partition has a
+    counter-model, the others are told to stop.
+    """
+    symbols = sorted(knowledge.symbols() | query.symbols())
+    workers = workers or os.cpu_count() or 1
+    if split is None:
+        split = (4 * workers - 1).bit_length()
+    split = min(split, len(symbols))
+    prefix, rest = symbols[:split], symbols[split:]
+
+    event = multiprocessing.Event()
+    executor = ProcessPoolExecutor(
+        max_workers=workers, initializer=init_worker, initargs=(event,)
+    )
+    try:
+        futures = [
+            executor.submit(
+                check_partition, knowledge, query, rest,
+                dict(zip(prefix, values))
+            )
+            for values in itertools.product([True, False], repeat=split)
+        ]
+        for future in as_completed(futures):
+            if future.result() is False:
+                return False
+        return True
+    finally:
+        event.set()
+        executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,140 @@
+import re
+import sys
+
+from logic import *
+
+# Splits a formula into alternating symbol names and operators/parentheses
+TOKENS = re.compile(r"(<=>|=>|¬|∧|∨|\(|\))")
+OPERATORS = {"<=>", "=>", "¬", "∧", "∨", "(", ")"}
+
+
+class Parser():
+
+    def __init__(self):
+        """
+        Create a parser for the syntax produced by `Sentence.formula`:
+        symbol names, parentheses, and from tightest to loosest binding
+        ¬, ∧, ∨, => (right associative) and <=> (left associative).
+        """
+        self.symbols = dict()
+        self.tokens = []
+        self.position = 0
+
+    def parse(self, text):
+        """Return the Sentence written as `text`."""
+        # Operators are kept as they are, names are stripped of the spaces
+        # around them, and None marks the end of the formula
+        self.tokens = [
+            token if token in OPERATORS else token.strip()
+            for token in TOKENS.split(text)
+        ]
+        self.tokens = [token for token in self.tokens if token] + [None]
+        if len(self.tokens) == 1:
+            raise ValueError("empty formula")
+        self.position = 0
+        sentence = self.biconditional()
+        if self.tokens[self.position] is not None:
+            raise ValueError(
+                f"unexpected {self.tokens[self.position]!r} in {text!r}"
+            )
+        return sentence
+
+    def biconditional(self):
+        left = self.implication()
+        while self.tokens[self.position] == "<=>":
+            self.position += 1
+            left = Biconditional(left, self.implication())
+        return left
+
+    def implication(self):
+        antecedent = self.disjunction()
+        if self.tokens[self.position] == "=>":
+            self.position += 1
+            return Implication(antecedent, self.implication())
+        return antecedent
+
+    def disjunction(self):
+        disjuncts = [self.conjunction()]
+        while self.tokens[self.position] == "∨":
+            self.position += 1
+            disjuncts.append(self.conjunction())
+        return disjuncts[0] if len(disjuncts) == 1 else Or(*disjuncts)
+
+    def conjunction(self):
+        conjuncts = [self.negation()]
+        while self.tokens[self.position] == "∧":
+            self.position += 1
+            conjuncts.append(self.negation())
+        return conjuncts[0] if len(conjuncts) == 1 else And(*conjuncts)
+
+    def negation(self):
+        token = self.tokens[self.position]
+        if token is None:
+            raise ValueError("unexpected end of formula")
+        self.position += 1
+        if token == "¬":
+            return Not(self.negation())
+        if token == "(":
+            sentence = self.biconditional()
+            if self.tokens[self.position] != ")":
+                raise ValueError("missing closing parenthesis")
+            self.position += 1
+            return sentence
+        if token in OPERATORS:
+            raise ValueError(f"unexpected {token!r}")
+        symbol = self.symbols.get(token)
+        if symbol is None:
+            symbol = self.symbols[token] = Symbol(token)
+        return symbol
+
+
+def parse(text):
+    """Return the Sentence written as `text`, e.g. "(A ∧ B) => ¬C"."""
+    return Parser().parse(text)
+
+
+def parse_file(filename):
+    """
+    Lazily generate the sentences in a knowledge base file, one per line.
+    Blank lines and lines starting with # are skipped.
+    """
+    parser = Parser()
+    with open(filename, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                yield parser.parse(line)
+            except ValueError as e:
+                raise ValueError(f"{filename}:{number}: {e}") from None
+
+
+def load_knowledge(filename):
+    """Return the conjunction of every sentence in a knowledge base file."""
+    return And(*parse_file(filename))
+
+
+def save_knowledge(knowledge, filename):
+    """
+    Write a knowledge base to a file readable by `load_knowledge`, with one
+    line per conjunct.
+    """
+    conjuncts = knowledge.conjuncts if isinstance(knowledge, And) else [
+        knowledge
+    ]
+    with open(filename, "w", encoding="utf-8") as f:
+        for conjunct in conjuncts:
+            f.write(conjunct.formula() + "\n")
+
+
+def main():
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python parsing.py knowledge")
+    knowledge = load_knowledge(sys.argv[1])
+    print(f"{len(knowledge.conjuncts)} sentences over "
+          f"{len(knowledge.symbols())} symbols")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,361 @@
+from logic import *
+
+
+class CNF():
+
+    def __init__(self):
+        """
+        Create an empty formula in conjunctive normal form.
+
+        Variables are numbered from 1, and a clause is a list of non-zero
+        integer literals: `v` means variable v is true, `-v` that it is
+        false (the DIMACS convention).
+        """
+        self.variables = dict()
+        self.names = [None]
+        self.clauses = []
+
+        # Literal already introduced for each compiled subformula, so that
+        # shared subformulas only get encoded once
+        self.literals = dict()
+
+    @property
+    def num_variables(self):
+        return len(self.names) - 1
+
+    def variable(self, name):
+        """Return the variable for the symbol called `name`."""
+        if name not in self.variables:
+            self.variables[name] = len(self.names)
+            self.names.append(name)
+        return self.variables[name]
+
+    def auxiliary(self):
+        """Return a fresh Tseitin variable not tied to any symbol."""
+        self.names.append(None)
+        return len(self.names) - 1
+
+    def add(self, sentence):
+        """
+        Add the constraint that `sentence` is true.
+
+        Conjunctions are split into separate constraints and disjunctions of
+        literals become a single clause; everything else is compiled with
+        the Tseitin transformation.
+        """
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.add(conjunct)
+        elif isinstance(sentence, Or):
+            self.clauses.append(
+                [self.literal(disjunct) for disjunct in sentence.disjuncts]
+            )
+        elif isinstance(sentence, Implication):
+            self.clauses.append([
+                -self.literal(sentence.antecedent),
+                self.literal(sentence.consequent)
+            ])
+        else:
+            self.clauses.append([self.literal(sentence)])
+
+    def literal(self, sentence):
+        """
+        Return a literal equivalent to `sentence`, adding the Tseitin
+        clauses that define it if needed.
+        """
+        if isinstance(sentence, Symbol):
+            return self.variable(sentence.name)
+        if isinstance(sentence, Not):
+            return -self.literal(sentence.operand)
+        if sentence in self.literals:
+            return self.literals[sentence]
+
+        x = self.auxiliary()
+        if isinstance(sentence, And):
+            children = [self.literal(c) for c in sentence.conjuncts]
+            for c in children:
+                self.clauses.append([-x, c])
+            self.clauses.append([x] + [-c for c in children])
+        elif isinstance(sentence, Or):
+            children = [self.literal(d) for d in sentence.disjuncts]
+            for d in children:
+                self.clauses.append([x, -d])
+            self.clauses.append([-x] + children)
+        elif isinstance(sentence, Implication):
+            a = self.literal(sentence.antecedent)
+            b = self.literal(sentence.consequent)
+            self.clauses.append([-x, -a, b])
+            self.clauses.append([x, a])
+            self.clauses.append([x, -b])
+        elif isinstance(sentence, Biconditional):
+            a = self.literal(sentence.left)
+            b = self.literal(sentence.right)
+            self.clauses.append([-x, -a, b])
+            self.clauses.append([-x, a, -b])
+            self.clauses.append([x, a, b])
+            self.clauses.append([x, -a, -b])
+        else:
+            raise TypeError(f"cannot compile {type(sentence).__name__}")
+        self.literals[sentence] = x
+        return x
+
+    def model(self, values):
+        """
+        Translate solver variable values into a model mapping every symbol
+        name to a boolean.
+        """
+        return {
+            name: bool(values[var])
+            for name, var in self.variables.items()
+        }
+
+
+class Solver():
+
+    def __init__(self, num_variables, clauses, pure_literals=True):
+        """
+        Create a DPLL solver over variables 1..`num_variables` and the given
+        clauses, using two watched literals per clause for unit propagation.
+
+        If `pure_literals` is True, variables appearing with a single
+        polarity are fixed up front. That keeps satisfiability but can
+        discard models, so disable it when models themselves matter.
+        """
+        self.num_variables = num_variables
+        self.pure_literals = pure_literals
+        self.values = [None] * (num_variables + 1)
+        self.trail = []
+        self.head = 0
+        self.watches = dict()
+        self.clauses = []
+        self.unsatisfiable = False
+
+        # Variables are branched on by descending number of occurrences
+        occurrences = [0] * (num_variables + 1)
+        units = []
+        for clause in clauses:
+            clause = list(dict.fromkeys(clause))
+            if any(-literal in clause for literal in clause):
+                continue
+            for literal in clause:
+                occurrences[abs(literal)] += 1
+            if not clause:
+                self.unsatisfiable = True
+            elif len(clause) == 1:
+                units.append(clause[0])
+            else:
+                self.watch(clause)
+        self.order = sorted(
+            range(1, num_variables + 1), key=lambda v: -occurrences[v]
+        )
+
+        # Unit clauses hold in every model, so propagate them once for good
+        for literal in units:
+            if not self.enqueue(literal):
+                self.unsatisfiable = True
+        if not self.propagate():
+            self.unsatisfiable = True
+
+    def add_clause(self, clause):
+        """
+        Add a clause between two calls to `solve`, e.g. a fact learned from
+        an earlier call.
+        """
+        if self.unsatisfiable:
+            return
+        clause = list(dict.fromkeys(clause))
+        if any(self.value(literal) is True for literal in clause):
+            return
+        clause = [
+            literal for literal in clause if self.value(literal) is not False
+        ]
+        if not clause:
+            self.unsatisfiable = True
+        elif len(clause) == 1:
+            self.enqueue(clause[0])
+            if not self.propagate():
+                self.unsatisfiable = True
+        else:
+            self.watch(clause)
+
+    def watch(self, clause):
+        self.clauses.append(clause)
+        self.watches.setdefault(clause[0], []).append(clause)
+        self.watches.setdefault(clause[1], []).append(clause)
+
+    def value(self, literal):
+        """Return True, False, or None if `literal` is unassigned."""
+        value = self.values[abs(literal)]
+        if value is None or literal > 0:
+            return value
+        return not value
+
+    def enqueue(self, literal):
+        """Make `literal` true; return False if it is already false."""
+        value = self.value(literal)
+        if value is not None:
+            return value
+        self.values[abs(literal)] = literal > 0
+        self.trail.append(literal)
+        return True
+
+    def propagate(self):
+        """
+        Perform unit propagation on the trail. Return False on a conflict.
+        """
+        while self.head < len(self.trail):
+            false = -self.trail[self.head]
+            self.head += 1
+            watching = self.watches.get(false)
+            if not watching:
+                continue
+            kept = []
+            for k, clause in enumerate(watching):
+                # Make sure the false literal is the second watch
+                if clause[0] == false:
+                    clause[0], clause[1] = clause[1], clause[0]
+                if self.value(clause[0]) is True:
+                    kept.append(clause)
+                    continue
+
+                # Look for another literal that is not false to watch
+                for i in range(2, len(clause)):
+                    if self.value(clause[i]) is not False:
+                        clause[1], clause[i] = clause[i], clause[1]
+                        self.watches.setdefault(clause[1], []).append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if not self.enqueue(clause[0]):
+                        kept.extend(watching[k + 1:])
+                        self.watches[false] = kept
+                        return False
+            self.watches[false] = kept
+        return True
+
+    def undo(self, size):
+        """Unassign everything assigned since the trail had `size` entries."""
+        while len(self.trail) > size:
+            self.values[abs(self.trail.pop())] = None
+        self.head = min(self.head, size)
+
+    def eliminate_pure_literals(self):
+        """Assign every variable that only occurs with a single polarity."""
+        polarity = dict()
+        for clause in self.clauses:
+            if any(self.value(literal) is True for literal in clause):
+                continue
+            for literal in clause:
+                if self.value(literal) is None:
+                    var = abs(literal)
+                    polarity[var] = polarity.get(var, 0) | (
+                        1 if literal > 0 else 2
+                    )
+        for var, seen in polarity.items():
+            if seen == 1:
+                self.enqueue(var)
+            elif seen == 2:
+                self.enqueue(-var)
+
+    def decide(self):
+        """Return an unassigned variable, or None if all are assigned."""
+        for var in self.order:
+            if self.values[var] is None:
+                return var
+        return None
+
+    def solve(self, assumptions=()):
+        """
+        Search for an assignment satisfying every clause and the literals
+        in `assumptions`. Return the list of variable values (indexed by
+        variable, unconstrained ones set to False) or None if there is none.
+        The solver is left in its initial state, so it can be reused.
+        """
+        if self.unsatisfiable:
+            return None
+        base = len(self.trail)
+        try:
+            for literal in assumptions:
+                if not self.enqueue(literal):
+                    return None
+            if not self.propagate():
+                return None
+            if self.pure_literals:
+                self.eliminate_pure_literals()
+                if not self.propagate():
+                    return None
+
+            # Stack of (trail size before the decision, literal, flipped)
+            decisions = []
+            while True:
+                var = self.decide()
+                if var is None:
+                    return [bool(value) for value in self.values]
+                decisions.append((len(self.trail), var, False))
+                self.enqueue(var)
+                while not self.propagate():
+                    while decisions and decisions[-1][2]:
+                        decisions.pop()
+                    if not decisions:
+                        return None
+                    size, literal, _ = decisions.pop()
+                    self.undo(size)
+                    decisions.append((size, -literal, True))
+                    self.enqueue(-literal)
+        finally:
+            self.undo(base)
+
+
+def satisfiable(sentence):
+    """
+    Return a model (dict from symbol name to boolean) in which `sentence`
+    is true, or None if it is unsatisfiable.
+    """
+    cnf = CNF()
+    cnf.add(sentence)
+    values = Solver(cnf.num_variables, cnf.clauses).solve()
+    return None if values is None else cnf.model(values)
+
+
+def entails(knowledge, query):
+    """
+    Checks if knowledge base entails query, i.e. if knowledge ∧ ¬query is
+    unsatisfiable.
+    """
+    cnf = CNF()
+    cnf.add(knowledge)
+    cnf.add(Not(query))
+    return Solver(cnf.num_variables, cnf.clauses).solve() is None
+
+
+def entails_all(knowledge, queries):
+    """
+    Checks which of `queries` the knowledge base entails, returning a list
+    of booleans.
+
+    The knowledge base and every query are compiled into one solver, with
+    query q standing for a literal that is asked to be false. Each model
+    found along the way refutes every query it falsifies, and every query
+    found to be entailed is added back as a learned unit clause.
+    """
+    cnf = CNF()
+    cnf.add(knowledge)
+    literals = [cnf.literal(query) for query in queries]
+    solver = Solver(cnf.num_variables, cnf.clauses)
+
+    def value(values, literal):
+        return values[literal] if literal > 0 else not values[-literal]
+
+    results = [None] * len(literals)
+    for k, literal in enumerate(literals):
+        if results[k] is not None:
+            continue
+        values = solver.solve(assumptions=[-literal])
+        if values is None:
+            results[k] = True
+            solver.add_clause([literal])
+            continue
+        for i in range(k, len(literals)):
+            if results[i] is None and not value(values, literals[i]):
+                results[i] = False
+    return results
@@ -1,5 +1,12 @@
 import itertools
 import random
+from math import exp, lgamma
+
+import numpy as np
+
+# Neighbors of each cell, keyed by board size, filled in as cells are first
+# played so that every AI on a board of that size shares them
+neighbor_lists = dict()
 
 
 class Minesweeper():
@@ -12,23 +19,23 @@ class Minesweeper():
         # Set initial width, height, and number of mines
         self.height = height
         self.width = width
-        self.mines = set()
-
-        # Initialize an empty field with no mines
-        self.board = []
-        for i in range(self.height):
-            row = []
-            for j in range(self.width):
-                row.append(False)
-            self.board.append(row)
 
-        # Add mines randomly
-        while len(self.mines) != mines:
-            i = random.randrange(height)
-            j = random.randrange(width)
-            if not self.board[i][j]:
-                self.mines.add((i, j))
-                self.board[i][j] = True
+        # Place mines on the first cells of a random permutation, drawn
+        # from `random` so that random.seed still fixes the board
+        rng = np.random.default_rng(random.getrandbits(64))
+        positions = rng.permutation(height * width)[:mines]
+        self.board = np.zeros((height, width), dtype=bool)
+        self.board.flat[positions] = True
+        rows, columns = np.divmod(positions, width)
+        self.mines = set(zip(rows.tolist(), columns.tolist()))
+
+        # Number of mines around every cell: the board convolved with a
+        # 3x3 kernel of ones, minus the cell itself
+        padded = np.pad(self.board, 1).astype(np.uint8)
+        self.counts = sum(
+            padded[di:di + height, dj:dj + width]
+            for di in range(3) for dj in range(3)
+        ) - padded[1:-1, 1:-1]
 
         # At first, player has found no mines
         self.mines_found = set()
@@ -49,8 +56,7 @@ class Minesweeper():
         print("--" * self.width + "-")
 
     def is_mine(self, cell):
-        i, j = cell
-        return self.board[i][j]
+        return bool(self.board[cell])
 
     def nearby_mines(self, cell):
         """
@@ -58,24 +64,7 @@ class Minesweeper():
         within one row and column of a given cell,
         not including the cell itself.
         """
-
-        # Keep count of nearby mines
-        count = 0
-
-        # Loop over all cells within one row and column
-        for i in range(cell[0] - 1, cell[0] + 2):
-            for j in range(cell[1] - 1, cell[1] + 2):
-
-                # Ignore the cell itself
-                if (i, j) == cell:
-                    continue
-
-                # Update count if cell in bounds and is mine
-                if 0 <= i < self.height and 0 <= j < self.width:
-                    if self.board[i][j]:
-                        count += 1
-
-        return count
+        return int(self.counts[cell])
 
     def won(self):
         """
@@ -89,36 +78,69 @@ class Sentence():
     Logical statement about a Minesweeper game
     A sentence consists of a set of board cells,
     and a count of the number of those cells which are mines.
+
+    Sentences are immutable, so they can be kept in sets and dicts.
     """
 
     def __init__(self, cells, count):
-        self.cells = set(cells)
+        self.cells = frozenset(cells)
         self.count = count
+        self.hash = hash((self.cells, count))
 
     def __eq__(self, other):
         return self.cells == other.cells and self.count == other.count
 
+    def __hash__(self):
+        return self.hash
+
     def __str__(self):
-        return f"{self.cells} = {self.count}"
+        return f"{set(self.cells)} = {self.count}"
 
     def known_mines(self):
-        if self.cells.__len__() == self.count:
-            return self.cells
+        if len(self.cells) == self.count:
+            return set(self.cells)
         return set()
 
     def known_safes(self):
         if self.count == 0:
-            return self.cells
+            return set(self.cells)
         return set()
 
-    def mark_mine(self, cell): # Remove cell from set and decrease count by one
+    def mark_mine(self, cell):
+        """Returns the sentence without `cell`, which is a mine."""
         if cell in self.cells:
-            self.cells.remove(cell)
-            self.count -= 1
+            return Sentence(self.cells - {cell}, self.count - 1)
+        return self
 
-    def mark_safe(self, cell): # Remove safe cell from cells set
+    def mark_safe(self, cell):
+        """Returns the sentence without `cell`, which is safe."""
         if cell in self.cells:
-            self.cells.remove(cell)
+            return Sentence(self.cells - {cell}, self.count)
+        return self
+
+
+def reduce_row(row, pivot, bit):
+    """
+    Returns `row` with the column `bit` cancelled by adding or subtracting
+    the `pivot` row, whose coefficient there is +1. Rows are (plus, minus,
+    count) with bitsets of the +1 and -1 coefficients; if cancelling would
+    make some coefficient 2 or -2, `row` is returned unchanged.
+    """
+    plus, minus, count = row
+    if plus & bit:
+        other_plus, other_minus, other_count = pivot
+    else:
+        other_minus, other_plus, other_count = pivot
+        other_count = -other_count
+    if plus & other_minus or minus & other_plus:
+        return row
+    used = plus | minus
+    other_used = other_plus | other_minus
+    return (
+        plus & ~other_used | other_minus & ~used,
+        minus & ~other_used | other_plus & ~used,
+        count - other_count
+    )
 
 
 class MinesweeperAI():
@@ -126,39 +148,221 @@ class MinesweeperAI():
     Minesweeper game player
     """
 
-    def __init__(self, height=8, width=8):
+    def __init__(self, height=8, width=8, mines=8, elimination=False):
 
-        # Set initial height and width
+        # Set initial height and width, and how many mines the board holds
         self.height = height
         self.width = width
+        self.total_mines = mines
+
+        # Whether to also draw conclusions by Gaussian elimination over the
+        # whole knowledge base, which finds more than comparing sentences
+        self.elimination = elimination
+        self.neighbor_lists = neighbor_lists.setdefault((height, width), {})
 
         # Keep track of which cells have been clicked on
         self.moves_made = set()
 
-        # Keep track of cells known to be safe or mines
+        # Keep track of cells known to be safe or mines, and of the safe
+        # cells not played yet
         self.mines = set()
         self.safes = set()
+        self.safe_moves = set()
+
+        # Set of sentences about the game known to be true, and the
+        # sentences each cell appears in
+        self.knowledge = set()
+        self.cell_sentences = dict()
+
+        # Sentences waiting to be added to the knowledge base
+        self.pending = []
+
+        # Mine configurations of each group of connected sentences, keyed
+        # by the group's sentences
+        self.components = dict()
 
-        # List of sentences about the game known to be true
-        self.knowledge = []
+        # Groups in which elimination found nothing to conclude
+        self.eliminated = set()
 
     def mark_mine(self, cell):
         """
-        Marks a cell as a mine, and updates all knowledge
-        to mark that cell as a mine as well.
+        Marks a cell as a mine, and queues every sentence containing
+        it to be replaced by the sentence without it.
         """
+        if cell in self.mines:
+            return
         self.mines.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_mine(cell)
+        for sentence in list(self.cell_sentences.get(cell, ())):
+            self.remove_sentence(sentence)
+            self.pending.append(sentence.mark_mine(cell))
 
     def mark_safe(self, cell):
         """
-        Marks a cell as safe, and updates all knowledge
-        to mark that cell as safe as well.
+        Marks a cell as safe, and queues every sentence containing
+        it to be replaced by the sentence without it.
         """
+        if cell in self.safes:
+            return
         self.safes.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_safe(cell)
+        if cell not in self.moves_made:
+            self.safe_moves.add(cell)
+        for sentence in list(self.cell_sentences.get(cell, ())):
+            self.remove_sentence(sentence)
+            self.pending.append(sentence.mark_safe(cell))
+
+    def neighbors(self, cell):
+        """Returns the cells around `cell` that are on the board."""
+        cells = self.neighbor_lists.get(cell)
+        if cells is None:
+            i, j = cell
+            cells = self.neighbor_lists[cell] = tuple(
+                (row, column)
+                for row in range(max(i - 1, 0), min(i + 2, self.height))
+                for column in range(max(j - 1, 0), min(j + 2, self.width))
+                if (row, column) != cell
+            )
+        return cells
+
+    def add_sentence(self, sentence):
+        self.knowledge.add(sentence)
+        for cell in sentence.cells:
+            self.cell_sentences.setdefault(cell, set()).add(sentence)
+
+    def remove_sentence(self, sentence):
+        self.knowledge.discard(sentence)
+        for cell in sentence.cells:
+            sentences = self.cell_sentences[cell]
+            sentences.discard(sentence)
+            if not sentences:
+                del self.cell_sentences[cell]
+
+    def infer(self):
+        """
+        Adds every pending sentence to the knowledge base, marking the
+        cells it proves safe or mines, until nothing new can be concluded.
+
+        A new sentence is only compared with the sentences sharing a cell
+        with it. When one sentence's cells are a subset of another's, the
+        larger sentence is replaced by their difference, which together
+        with the smaller sentence says the same thing.
+        """
+        while self.pending:
+            sentence = self.pending.pop()
+
+            # Drop cells that are already known
+            mines = [cell for cell in sentence.cells if cell in self.mines]
+            safes = [cell for cell in sentence.cells if cell in self.safes]
+            if mines or safes:
+                sentence = Sentence(
+                    sentence.cells.difference(mines, safes),
+                    sentence.count - len(mines)
+                )
+            if not sentence.cells or sentence in self.knowledge:
+                continue
+
+            if sentence.count == 0:
+                for cell in sentence.cells:
+                    self.mark_safe(cell)
+                continue
+            if sentence.count == len(sentence.cells):
+                for cell in sentence.cells:
+                    self.mark_mine(cell)
+                continue
+            related = set()
+            for cell in sentence.cells:
+                related.update(self.cell_sentences.get(cell, ()))
+
+            # A known subset of the new sentence replaces it with the rest
+            subset = None
+            for other in related:
+                if other.cells < sentence.cells:
+                    subset = other
+                    break
+            if subset is not None:
+                self.pending.append(Sentence(
+                    sentence.cells - subset.cells,
+                    sentence.count - subset.count
+                ))
+                continue
+
+            # Known supersets of the new sentence are replaced by the rest
+            for other in related:
+                if sentence.cells < other.cells:
+                    self.remove_sentence(other)
+                    self.pending.append(Sentence(
+                        other.cells - sentence.cells,
+                        other.count - sentence.count
+                    ))
+            self.add_sentence(sentence)
+
+    def eliminate(self):
+        """
+        Row-reduces each group of connected sentences and returns the sets
+        of cells (safes, mines) the reduced rows prove.
+
+        Every row is a linear equation over 0/1 mine variables, stored as
+        bitsets of the cells with coefficient +1 and -1 plus the count.
+        A row whose count equals the sum of its positive coefficients needs
+        every +1 cell to be a mine and every -1 cell to be safe, and the
+        other way around when the count equals the sum of its negative
+        coefficients. A row is not reduced by a pivot if that would give a
+        coefficient of 2, so conclusions are always sound but the matrix
+        may not be fully reduced.
+        """
+        safes = set()
+        mines = set()
+        groups = self.frontier()
+        self.eliminated &= set(groups)
+        for group in groups:
+            if group in self.eliminated:
+                continue
+            cells = sorted(set().union(*(s.cells for s in group)))
+            bits = {cell: 1 << i for i, cell in enumerate(cells)}
+            rows = []
+            for sentence in group:
+                plus = 0
+                for cell in sentence.cells:
+                    plus |= bits[cell]
+                rows.append((plus, 0, sentence.count))
+
+            pivot = 0
+            for bit in bits.values():
+                for r in range(pivot, len(rows)):
+                    if (rows[r][0] | rows[r][1]) & bit:
+                        break
+                else:
+                    continue
+
+                # Move the pivot row up, with a +1 in the pivot column
+                plus, minus, count = rows[r]
+                if minus & bit:
+                    plus, minus, count = minus, plus, -count
+                rows[r] = rows[pivot]
+                rows[pivot] = (plus, minus, count)
+
+                for k, row in enumerate(rows):
+                    if k != pivot and (row[0] | row[1]) & bit:
+                        rows[k] = reduce_row(row, rows[pivot], bit)
+                pivot += 1
+
+            found = False
+            for plus, minus, count in rows:
+                if count == bin(plus).count("1"):
+                    proven_mines, proven_safes = plus, minus
+                elif count == -bin(minus).count("1"):
+                    proven_mines, proven_safes = minus, plus
+                else:
+                    continue
+                for cell, bit in bits.items():
+                    if proven_mines & bit:
+                        mines.add(cell)
+                        found = True
+                    elif proven_safes & bit:
+                        safes.add(cell)
+                        found = True
+            if not found:
+                self.eliminated.add(group)
+        return safes, mines
 
     def add_knowledge(self, cell, count):
         """
@@ -176,78 +380,246 @@ class MinesweeperAI():
                if they can be inferred from existing knowledge
         """
         self.moves_made.add(cell) #Store information about the cell
+        self.safe_moves.discard(cell)
         self.mark_safe(cell)
-        surrounding_cells = set()
-        for i in range(cell[0]-1 if cell[0] - 1 >= 0 else 0, cell[0]+2 if cell[0] + 2 <= self.width else self.width):
-            for j in range(cell[1]-1 if cell[1] - 1 >= 0 else 0, cell[1]+2 if cell[1] + 2 <= self.height else self.height):
-                count -= int((i, j) in self.mines)
-                if (i, j) not in self.safes.union(self.mines):
-                    surrounding_cells.add((i, j))
-
-        new_knowledge = Sentence(surrounding_cells, count)
-        if new_knowledge in self.knowledge:
-            return
-        inferred_knowledge = []
-        knowledge_cpy = self.knowledge.copy()
-        popped = 0
-        for i, sentence in enumerate(knowledge_cpy):
-            if sentence.cells == set():
-                self.knowledge.pop(i - popped)
-                popped += 1
-                continue
-            if new_knowledge.cells.issubset(sentence.cells):
-                new_cells = sentence.cells - new_knowledge.cells
-                new_count = sentence.count - new_knowledge.count
-                new_sentence = Sentence(new_cells, new_count)
-                inferred_knowledge.append(Sentence(new_cells, new_count))
-
-            elif sentence.cells.issubset(new_knowledge.cells):
-                new_cells = new_knowledge.cells - sentence.cells
-                new_count = new_knowledge.count - sentence.count
-                new_sentence = Sentence(new_cells, new_count)
-                inferred_knowledge.append(new_sentence)
-
-        for i in inferred_knowledge:
-            if i.known_safes() != set():
-                for j in i.cells:
-                    self.mark_safe(j)
-            elif i.known_mines() != set():
-                for j in i.cells:
-                    self.mark_mine(j)
-
-        for i in self.knowledge:
-            cells = i.cells.copy()
-            if i.known_safes() != set():
-                for j in cells:
-                    self.mark_safe(j)
-            elif i.known_mines() != set():
-                for j in cells:
-                    self.mark_mine(j)
-
-        inferred_knowledge.append(new_knowledge)
-        for i in inferred_knowledge:
-            exists = False
-            for j in self.knowledge:
-                if i == j:
-                    exists = True
-            if not exists:
-                self.knowledge.append(i)
+        self.pending.append(Sentence(self.neighbors(cell), count))
+        self.infer()
+        while self.elimination:
+            safes, mines = self.eliminate()
+            if not safes and not mines:
+                break
+            for safe in safes:
+                self.mark_safe(safe)
+            for mine in mines:
+                self.mark_mine(mine)
+            self.infer()
 
     def make_safe_move(self):
-        available_moves = self.safes - self.moves_made
-        for s in self.knowledge:
-            available_moves = available_moves.union(s.known_safes())
-        if available_moves.__len__() == 0:
-            return None
-        return available_moves.pop()
+        for move in self.safe_moves:
+            return move
+        return None
+
+    def frontier(self):
+        """
+        Returns the knowledge base split into groups of sentences that
+        share no cells with the other groups, as frozensets.
+        """
+        groups = []
+        seen = set()
+        for sentence in self.knowledge:
+            if sentence in seen:
+                continue
+            seen.add(sentence)
+            group = [sentence]
+            for member in group:
+                for cell in member.cells:
+                    for other in self.cell_sentences[cell]:
+                        if other not in seen:
+                            seen.add(other)
+                            group.append(other)
+            groups.append(frozenset(group))
+        return groups
+
+    def configurations(self, sentences):
+        """
+        Enumerates the mine placements consistent with a group of
+        sentences. Returns a dict mapping each possible number of mines
+        to (number of placements, {cell: placements where it is a mine}).
+        """
+        # Visit cells in breadth-first order so sentences fill up quickly
+        start = min(cell for sentence in sentences for cell in sentence.cells)
+        order = [start]
+        placed = {start}
+        for current in order:
+            for sentence in self.cell_sentences[current]:
+                for other in sorted(sentence.cells):
+                    if other not in placed:
+                        placed.add(other)
+                        order.append(other)
+
+        sentences = list(sentences)
+        index = {sentence: i for i, sentence in enumerate(sentences)}
+        constraints = [
+            [index[sentence] for sentence in self.cell_sentences[cell]]
+            for cell in order
+        ]
+        need = [sentence.count for sentence in sentences]
+        left = [len(sentence.cells) for sentence in sentences]
+        mines = []
+        results = dict()
+
+        def place(position):
+            if position == len(order):
+                result = results.setdefault(len(mines), [0, dict()])
+                result[0] += 1
+                counts = result[1]
+                for cell in mines:
+                    counts[cell] = counts.get(cell, 0) + 1
+                return
+            cell, touched = order[position], constraints[position]
+            for mine in (True, False):
+                consistent = True
+                for i in touched:
+                    left[i] -= 1
+                    if mine:
+                        need[i] -= 1
+                    if need[i] < 0 or need[i] > left[i]:
+                        consistent = False
+                if consistent:
+                    if mine:
+                        mines.append(cell)
+                    place(position + 1)
+                    if mine:
+                        mines.pop()
+                for i in touched:
+                    left[i] += 1
+                    if mine:
+                        need[i] += 1
+
+        place(0)
+        return {
+            count: (total, counts)
+            for count, (total, counts) in results.items()
+        }
+
+    def mine_probabilities(self):
+        """
+        Returns the probability that each cell in the knowledge base is a
+        mine, given the knowledge base and the number of mines left on the
+        board, and the probability for any other unknown cell (None if
+        there are no other unknown cells).
+
+        Groups of connected sentences are enumerated independently (and
+        cached until one of their sentences changes), then combined by
+        weighting every choice of mines per group by the number of ways to
+        place the remaining mines on the cells no sentence mentions.
+        """
+        groups = self.frontier()
+        self.components = {
+            group: self.components.get(group) or self.configurations(group)
+            for group in groups
+        }
+        distributions = [self.components[group] for group in groups]
+
+        unknown = self.height * self.width - len(self.safes) - len(self.mines)
+        outside = unknown - len(self.cell_sentences)
+        remaining = self.total_mines - len(self.mines)
+
+        def convolve(first, second):
+            combined = dict()
+            for a, x in first.items():
+                for b, y in second.items():
+                    combined[a + b] = combined.get(a + b, 0) + x * y
+            return combined
+
+        # Placements per number of mines of every group but one, using
+        # products of the groups before and after it
+        totals = [
+            {count: total for count, (total, _) in distribution.items()}
+            for distribution in distributions
+        ]
+        prefix = [{0: 1}]
+        for total in totals:
+            prefix.append(convolve(prefix[-1], total))
+        suffix = [{0: 1}]
+        for total in reversed(totals):
+            suffix.append(convolve(suffix[-1], total))
+        suffix.reverse()
+
+        # Ways to place the other mines on the cells outside every group,
+        # relative to the most likely number of mines in the groups (the
+        # binomials themselves get huge on large boards)
+        def log_ways(mines):
+            rest = remaining - mines
+            if rest < 0 or rest > outside:
+                return None
+            return (
+                lgamma(outside + 1) - lgamma(rest + 1)
+                - lgamma(outside - rest + 1)
+            )
+
+        logs = {mines: log_ways(mines) for mines in prefix[-1]}
+        largest = max(
+            (log for log in logs.values() if log is not None), default=0
+        )
+        weights = {
+            mines: 0.0 if log is None else exp(log - largest)
+            for mines, log in logs.items()
+        }
+
+        everything = sum(
+            ways * weights[count] for count, ways in prefix[-1].items()
+        )
+        if everything == 0:
+            return (
+                {cell: 0.5 for cell in self.cell_sentences},
+                0.5 if outside else None
+            )
+
+        probabilities = dict()
+        for i, distribution in enumerate(distributions):
+            others = convolve(prefix[i], suffix[i + 1])
+            for count, (_, counts) in distribution.items():
+                rest = sum(
+                    ways * weights[count + other]
+                    for other, ways in others.items()
+                )
+                for cell, mines in counts.items():
+                    probabilities[cell] = (
+                        probabilities.get(cell, 0) + mines * rest
+                    )
+        for cell in self.cell_sentences:
+            probabilities[cell] = probabilities.get(cell, 0) / everything
+
+        elsewhere = None
+        if outside:
+            elsewhere = sum(
+                ways * weights[count] * (remaining - count)
+                for count, ways in prefix[-1].items()
+            ) / (outside * everything)
+        return probabilities, elsewhere
+
+    def unknown_cell(self):
+        """
+        Returns a cell that is not known to be safe or a mine and not in
+        the knowledge base, preferring corners, or None if there is none.
+        """
+        def unknown(cell):
+            return (
+                cell not in self.safes and cell not in self.mines
+                and cell not in self.cell_sentences
+            )
+
+        # Corners are most likely to open up the board, then sample, which
+        # is quick while much of the board is unknown
+        for cell in (
+            (0, 0), (0, self.width - 1),
+            (self.height - 1, 0), (self.height - 1, self.width - 1)
+        ):
+            if unknown(cell):
+                return cell
+        for _ in range(64):
+            cell = (random.randrange(self.height), random.randrange(self.width))
+            if unknown(cell):
+                return cell
+        for i in range(self.height):
+            for j in range(self.width):
+                if unknown((i, j)):
+                    return (i, j)
+        return None
 
     def make_random_move(self):
-        unavailable_moves = self.moves_made.union(self.mines)
-        available_moves = set()
-        for i in range(self.width):
-            for j in range(self.height):
-                if (i, j) not in unavailable_moves:
-                    available_moves.add((i, j))
-        if available_moves.__len__() == 0:
-            return None
-        return available_moves.pop()
+        """
+        Returns the unknown cell least likely to be a mine, or None if
+        there are no moves left to make.
+        """
+        probabilities, elsewhere = self.mine_probabilities()
+        best = min(
+            probabilities, key=lambda cell: (probabilities[cell], cell),
+            default=None
+        )
+        if elsewhere is not None and (
+            best is None or elsewhere < probabilities[best]
+        ):
+            return self.unknown_cell()
+        return best
@@ -0,0 +1,166 @@
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from minesweeper import Minesweeper, MinesweeperAI
+
+
+def play(height, width, mines, seed, elimination=False):
+    """
+    Play one game of Minesweeper with the AI (inferring by Gaussian
+    elimination if `elimination` is True), with the mines placed from
+    `seed`, and return a dict describing it: whether it was won, the
+    number of moves and guesses made, and how long each move took the AI
+    (choosing the move and adding what it revealed) in seconds.
+    """
+    random.seed(seed)
+    game = Minesweeper(height=height, width=width, mines=mines)
+    ai = MinesweeperAI(
+        height=height, width=width, mines=mines, elimination=elimination
+    )
+    result = {
+        "seed": seed,
+        "won": False,
+        "moves": 0,
+        "guesses": 0,
+        "latencies": [],
+    }
+    safe_cells = height * width - mines
+    while len(ai.moves_made) < safe_cells:
+        start = time.perf_counter()
+        move = ai.make_safe_move()
+        if move is None:
+            move = ai.make_random_move()
+            result["guesses"] += 1
+        if move is None or game.is_mine(move):
+            result["latencies"].append(time.perf_counter() - start)
+            break
+        ai.add_knowledge(move, game.nearby_mines(move))
+        result["latencies"].append(time.perf_counter() - start)
+        result["moves"] += 1
+    result["won"] = len(ai.moves_made) == safe_cells
+    return result
+
+
+def play_all(height, width, mines, seeds, elimination=False):
+    """Play a game for every seed in this process."""
+    return [
+        play(height, width, mines, seed, elimination) for seed in seeds
+    ]
+
+
+def percentile(values, fraction):
+    """Return the value below which `fraction` of the sorted `values` lie."""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def simulate(games, height=8, width=8, mines=8, seed=0, workers=None,
+             elimination=False):
+    """
+    Play `games` games on a height x width board with `mines` mines, game
+    i using seed `seed + i`, and return a summary of the results: win
+    rate, guesses per game and per-move latency percentiles (in ms).
+
+    The games are split across `workers` processes (all CPUs by default;
+    1 plays them in this process), so results do not depend on the number
+    of workers.
+    """
+    seeds = list(range(seed, seed + games))
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or games <= 1:
+        results = play_all(height, width, mines, seeds, elimination)
+    else:
+        size = -(-games // workers)
+        chunks = [seeds[start:start + size] for start in range(0, games, size)]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = [
+                result
+                for chunk in executor.map(
+                    play_all,
+                    [height] * len(chunks), [width] * len(chunks),
+                    [mines] * len(chunks), chunks,
+                    [elimination] * len(chunks)
+                )
+                for result in chunk
+            ]
+
+    latencies = sorted(
+        latency for result in results for latency in result["latencies"]
+    )
+    wins = sum(result["won"] for result in results)
+    return {
+        "games": games,
+        "height": height,
+        "width": width,
+        "mines": mines,
+        "elimination": elimination,
+        "wins": wins,
+        "win_rate": wins / games if games else 0.0,
+        "guesses_per_game": (
+            sum(result["guesses"] for result in results) / games
+            if games else 0.0
+        ),
+        "moves": len(latencies),
+        "latency_ms": {
+            name: percentile(latencies, fraction) * 1000
+            for name, fraction in (
+                ("p50", 0.5), ("p90", 0.9), ("p99", 0.99), ("max", 1.0)
+            )
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Play many games of Minesweeper with the AI, headless."
+    )
+    parser.add_argument("-n", "--games", type=int, default=1000)
+    parser.add_argument("--height", type=int, default=8)
+    parser.add_argument("--width", type=int, default=8)
+    parser.add_argument("-m", "--mines", type=int,
+                        help="number of mines (default: 8)")
+    parser.add_argument("-d", "--density", type=float,
+                        help="fraction of cells that are mines")
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    parser.add_argument("-j", "--workers", type=int,
+                        help="worker processes (default: all CPUs)")
+    parser.add_argument("-e", "--elimination", action="store_true",
+                        help="infer by Gaussian elimination")
+    parser.add_argument("--json", action="store_true",
+                        help="print the summary as JSON")
+    args = parser.parse_args()
+
+    if args.mines is not None and args.density is not None:
+        sys.exit("Use either --mines or --density, not both")
+    if args.density is not None:
+        mines = round(args.density * args.height * args.width)
+    else:
+        mines = 8 if args.mines is None else args.mines
+    if not 0 <= mines < args.height * args.width:
+        sys.exit("The board needs at least one safe cell")
+
+    summary = simulate(
+        args.games, args.height, args.width, mines, args.seed, args.workers,
+        args.elimination
+    )
+    if args.json:
+        print(json.dumps(summary))
+        return
+    latency = summary["latency_ms"]
+    print(f"{summary['games']} games on {args.height}x{args.width} "
+          f"with {mines} mines")
+    print(f"Win rate: {summary['win_rate']:.1%}")
+    print(f"Guesses per game: {summary['guesses_per_game']:.2f}")
+    print(f"Move latency: p50 {latency['p50']:.3f} ms, "
+          f"p90 {latency['p90']:.3f} ms, p99 {latency['p99']:.3f} ms, "
+          f"max {latency['max']:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,8 @@ import math
 import random
 import time
 
+import numpy as np
+
 
 class Nim():
 
@@ -72,20 +74,61 @@ class Nim():
 
 class NimAI():
 
-    def __init__(self, alpha=0.5, epsilon=0.2):
+    def __init__(self, alpha=0.5, epsilon=0.2, initial=[1, 3, 5, 7]):
         """
-        Initialize AI with an empty Q-learning dictionary,
-        an alpha (learning) rate, and an epsilon rate.
-
-        The Q-learning dictionary maps `(state, action)`
-        pairs to a Q-value (a number).
-         - `state` is a tuple of remaining piles, e.g. (1, 1, 4, 4)
-         - `action` is a tuple `(i, j)` for an action
+        Initialize AI with an all-zero Q-table for games starting from
+        the piles `initial`, an alpha (learning) rate, and an epsilon rate.
+
+        `self.q` is a NumPy array with a row per state and a column per
+        action, holding the Q-value of each `(state, action)` pair.
+         - a state, e.g. [1, 1, 4, 4], is numbered by reading its piles
+           as the digits of a mixed-radix number, pile i having base
+           initial[i] + 1
+         - action `(i, j)` has column `self.action_ids[(i, j)]`
         """
-        self.q = dict()
         self.alpha = alpha
         self.epsilon = epsilon
 
+        # Place value of each pile in a state's number
+        self.weights = []
+        weight = 1
+        for pile in reversed(initial):
+            self.weights.insert(0, weight)
+            weight *= pile + 1
+        states = weight
+
+        self.actions = [
+            (i, j) for i, pile in enumerate(initial)
+            for j in range(1, pile + 1)
+        ]
+        self.action_ids = {
+            action: k for k, action in enumerate(self.actions)
+        }
+        self.q = np.zeros((states, len(self.actions)))
+
+        # The piles of every state, which actions are legal in it, and the
+        # state each action leads to (removing j from pile i lowers the
+        # state's number by j times the pile's place value)
+        piles = np.indices([pile + 1 for pile in initial]).reshape(
+            len(initial), states
+        ).T
+        pile_of = np.array([i for i, _ in self.actions])
+        count_of = np.array([j for _, j in self.actions])
+        self.legal = piles[:, pile_of] >= count_of
+        self.next_state = (
+            np.arange(states)[:, None]
+            - count_of * np.array(self.weights)[pile_of]
+        )
+
+        # The legal actions of every state first in its row, and how many
+        # there are, so that a random legal action can be drawn by index
+        self.legal_actions = np.argsort(~self.legal, axis=1, kind="stable")
+        self.legal_counts = self.legal.sum(axis=1)
+
+    def state_id(self, state):
+        """Return the row of `self.q` for the piles `state`."""
+        return sum(pile * weight for pile, weight in zip(state, self.weights))
+
     def update(self, old_state, action, new_state, reward):
         """
         Update Q-learning model, given an old state, an action taken
@@ -99,11 +142,9 @@ class NimAI():
     def get_q_value(self, state, action):
         """
         Return the Q-value for the state `state` and the action `action`.
-        If no Q-value exists yet in `self.q`, return 0.
+        Q-values of pairs that were never updated are 0.
         """
-        if (tuple(state), action,) not in self.q:
-            return 0
-        return self.q[(tuple(state), action)]
+        return float(self.q[self.state_id(state), self.action_ids[action]])
 
     def update_q_value(self, state, action, old_q, reward, future_rewards):
         """
@@ -120,42 +161,28 @@ class NimAI():
         `alpha` is the learning rate, and `new value estimate`
         is the sum of the current reward and estimated future rewards.
         """
-        self.q[(tuple(state), action)] = old_q + self.alpha*(reward + future_rewards - old_q)
+        self.q[self.state_id(state), self.action_ids[action]] = (
+            old_q + self.alpha * (reward + future_rewards - old_q)
+        )
 
     def best_future_reward(self, state):
         """
         Given a state `state`, consider all possible `(state, action)`
         pairs available in that state and return the maximum of all
-        of their Q-values.
-
-        Use 0 as the Q-value if a `(state, action)` pair has no
-        Q-value in `self.q`. If there are no available actions in
+        of their Q-values. If there are no available actions in
         `state`, return 0.
         """
-        actions = Nim.available_actions(state)
-        if not actions:
-            return 0
-        best = [0, set()]
-        for i in actions:
-            val = self.get_q_value(state, i)
-            if not val:
-                continue
-            elif val > best[0]:
-                best[1] = {val}
-            elif val == best[0]:
-                best[1].add(val)
-        if best[1]:
-            return next(iter(best[1]))
-        else:
+        s = self.state_id(state)
+        if not self.legal_counts[s]:
             return 0
+        return float(self.q[s, self.legal[s]].max())
 
     def choose_action(self, state, epsilon=True):
         """
         Given a state `state`, return an action `(i, j)` to take.
 
         If `epsilon` is `False`, then return the best action
-        available in the state (the one with the highest Q-value,
-        using 0 for pairs that have no Q-values).
+        available in the state (the one with the highest Q-value).
 
         If `epsilon` is `True`, then with probability
         `self.epsilon` choose a random available action,
@@ -164,81 +191,91 @@ class NimAI():
         If multiple actions have the same Q-value, any of those
         options is an acceptable return value.
         """
-        actions = Nim.available_actions(state)
-        if epsilon:
-            epsilon = self.epsilon * 100
-        else:
-            epsilon = 0
-        if 100 - random.randint(0, 100) >= epsilon:
-            best = [0, set()]
-            for i in actions:
-                val = self.get_q_value(state, i)
-                if not val:
-                    continue
-                elif val > best[0]:
-                    best[1] = {i}
-                elif val == best[0]:
-                    best[1].add(i)
-            if best[1]:
-                return next(iter(best[1]))
-            else:
-                return random.sample(actions, 1)[0]
-        else:
-            return random.sample(actions, 1)[0]
+        s = self.state_id(state)
+        legal = self.legal_actions[s, :self.legal_counts[s]]
+        if not len(legal):
+            return None
+        if epsilon and random.random() < self.epsilon:
+            return self.actions[random.choice(legal)]
+        return self.actions[legal[np.argmax(self.q[s, legal])]]
+
+    def future_rewards(self):
+        """
+        Return the best Q-value of every state, or 0 for states with no
+        legal actions.
+        """
+        best = np.where(self.legal, self.q, -np.inf).max(axis=1)
+        best[self.legal_counts == 0] = 0
+        return best
+
+    def self_play(self, games, rng):
+        """
+        Play `games` training games against itself at once, drawing random
+        numbers from the NumPy Generator `rng`, and update the Q-table.
+
+        Every game makes its next move in the same step, and the updates
+        of a step are applied together: when several games update the same
+        `(state, action)` pair in one step, one of their updates is kept.
+        """
+        start = self.q.shape[0] - 1
+        state = np.full(games, start)
+        player = np.zeros(games, dtype=int)
+        last_state = np.zeros((games, 2), dtype=int)
+        last_action = np.full((games, 2), -1)
+        playing = np.arange(games)
+
+        while len(playing):
+            s = state[playing]
+            p = player[playing]
+            other = 1 - p
+
+            # Epsilon-greedy moves: a random legal action, or the best one
+            masked = np.where(self.legal[s], self.q[s], -np.inf)
+            action = masked.argmax(axis=1)
+            explore = rng.random(len(playing)) < self.epsilon
+            if explore.any():
+                pick = (
+                    rng.random(explore.sum()) * self.legal_counts[s[explore]]
+                ).astype(int)
+                action[explore] = self.legal_actions[s[explore], pick]
+            last_state[playing, p] = s
+            last_action[playing, p] = action
+            new_state = self.next_state[s, action]
+            future = self.future_rewards()[new_state]
+            over = new_state == 0
+
+            # The player who moved last loses, and the other one wins
+            updates = [(s[over], action[over], -1, future[over])]
+            previous_state = last_state[playing, other]
+            previous_action = last_action[playing, other]
+            moved = previous_action >= 0
+            updates.append((
+                previous_state[moved], previous_action[moved],
+                np.where(over[moved], 1, 0), future[moved]
+            ))
+            for states, actions, reward, best in updates:
+                old = self.q[states, actions]
+                self.q[states, actions] = (
+                    old + self.alpha * (reward + best - old)
+                )
 
+            state[playing] = new_state
+            player[playing] = other
+            playing = playing[~over]
 
-def train(n):
+
+def train(n, batch_size=1000, seed=None):
     """
-    Train an AI by playing `n` games against itself.
+    Train an AI by playing `n` games against itself, `batch_size` games
+    at a time.
     """
 
     player = NimAI()
+    rng = np.random.default_rng(seed)
 
     # Play n games
-    for i in range(n):
-        print(f"Playing training game {i + 1}")
-        game = Nim()
-
-        # Keep track of last move made by either player
-        last = {
-            0: {"state": None, "action": None},
-            1: {"state": None, "action": None}
-        }
-
-        # Game loop
-        while True:
-
-            # Keep track of current state and action
-            state = game.piles.copy()
-            action = player.choose_action(game.piles)
-
-            # Keep track of last state and action
-            last[game.player]["state"] = state
-            last[game.player]["action"] = action
-
-            # Make move
-            game.move(action)
-            new_state = game.piles.copy()
-
-            # When game is over, update Q values with rewards
-            if game.winner is not None:
-                player.update(state, action, new_state, -1)
-                player.update(
-                    last[game.player]["state"],
-                    last[game.player]["action"],
-                    new_state,
-                    1
-                )
-                break
-
-            # If game is continuing, no rewards yet
-            elif last[game.player]["state"] is not None:
-                player.update(
-                    last[game.player]["state"],
-                    last[game.player]["action"],
-                    new_state,
-                    0
-                )
+    for start in range(0, n, batch_size):
+        player.self_play(min(batch_size, n - start), rng)
 
     print("Done training")
 
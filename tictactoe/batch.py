@@ -0,0 +1,93 @@
+"""
+Batch Tic Tac Toe position evaluation
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import tictactoe as ttt
+
+
+def evaluate(board):
+	"""
+	Returns (best action, minimax value) for a board, where the action is
+	None if the game is over. Uses (and fills) the shared transposition
+	table in tictactoe.py.
+	"""
+	if ttt.terminal(board):
+		return None, ttt.utility(board)
+	maximizing = ttt.player(board) == ttt.X
+	best_action, best_value = None, None
+	for action in sorted(ttt.actions(board)):
+		child = ttt.result(board, action)
+		value = ttt.min_value(child) if maximizing else ttt.max_value(child)
+		if best_value is None or (
+			value > best_value if maximizing else value < best_value
+		):
+			best_action, best_value = action, value
+	return best_action, best_value
+
+
+def evaluate_cells(cells):
+	"""Evaluates a board given as a tuple of 9 cells (row-major)."""
+	board = [list(cells[3 * i:3 * i + 3]) for i in range(3)]
+	action, value = evaluate(board)
+	return (None if action is None else 3 * action[0] + action[1]), value
+
+
+def evaluate_shard(shard):
+	"""Evaluates a list of boards (as cell tuples) in a worker process."""
+	return [evaluate_cells(cells) for cells in shard]
+
+
+def init_worker():
+	# Solve every position once, so each board in the shard is a lookup
+	ttt.solve_table()
+
+
+def evaluate_positions(boards, workers=1):
+	"""
+	Returns a list of (best action, minimax value) for every board in
+	`boards`, in order.
+
+	Boards that are rotations or reflections of each other are evaluated
+	only once, and the best action is mapped back onto each of them. All
+	boards share the transposition table; with `workers` > 1 (or None for
+	every CPU) the distinct positions are sharded across a process pool.
+	"""
+	forms = []
+	unique = dict()
+	for board in boards:
+		key, symmetry = ttt.canonical_form(board)
+		forms.append((key, symmetry))
+		if key not in unique:
+			cells = [cell for row in board for cell in row]
+			unique[key] = tuple(cells[index] for index in symmetry)
+
+	keys = list(unique)
+	workers = workers or os.cpu_count() or 1
+	if workers == 1 or len(keys) < 2:
+		results = [evaluate_cells(unique[key]) for key in keys]
+	else:
+		size = -(-len(keys) // workers)
+		shards = [
+			[unique[key] for key in keys[start:start + size]]
+			for start in range(0, len(keys), size)
+		]
+		with ProcessPoolExecutor(
+			max_workers=workers, initializer=init_worker
+		) as executor:
+			results = [
+				result for shard in executor.map(evaluate_shard, shards)
+				for result in shard
+			]
+	solved = dict(zip(keys, results))
+
+	evaluations = []
+	for key, symmetry in forms:
+		cell, value = solved[key]
+		if cell is None:
+			evaluations.append((None, value))
+		else:
+			evaluations.append((divmod(symmetry[cell], 3), value))
+	return evaluations
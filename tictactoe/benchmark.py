@@ -0,0 +1,45 @@
+import time
+
+import bitboard
+import tictactoe as ttt
+
+
+def search_lists(board, counter):
+	"""Plain minimax over the whole game tree with the list engine."""
+	counter[0] += 1
+	if ttt.terminal(board):
+		return ttt.utility(board)
+	values = [search_lists(ttt.result(board, action), counter)
+			  for action in ttt.actions(board)]
+	return max(values) if ttt.player(board) == ttt.X else min(values)
+
+
+def search_bits(state, counter):
+	"""Plain minimax over the whole game tree with the bitboard engine."""
+	counter[0] += 1
+	if bitboard.terminal(state):
+		return bitboard.utility(state)
+	values = [search_bits(bitboard.result(state, move), counter)
+			  for move in bitboard.actions(state)]
+	return max(values) if bitboard.player(state) == ttt.X else min(values)
+
+
+def measure(name, search, state):
+	counter = [0]
+	start = time.perf_counter()
+	value = search(state, counter)
+	seconds = time.perf_counter() - start
+	print(f"{name:<10}{counter[0]:>10}{seconds:>10.2f}"
+		  f"{counter[0] / seconds:>14,.0f}   value {value}")
+	return counter[0] / seconds
+
+
+def main():
+	print(f"{'engine':<10}{'nodes':>10}{'seconds':>10}{'nodes/sec':>14}")
+	lists = measure("lists", search_lists, ttt.initial_state())
+	bits = measure("bitboard", search_bits, bitboard.INITIAL_STATE)
+	print(f"bitboard is {bits / lists:.1f}x faster")
+
+
+if __name__ == "__main__":
+	main()
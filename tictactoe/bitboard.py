@@ -0,0 +1,161 @@
+"""
+Tic Tac Toe on bitboards
+
+A state is a pair (x, o) of 9-bit integers, where bit 3 * i + j is set if
+that player has a mark in row i, column j.
+"""
+
+import tictactoe as ttt
+
+FULL = 0b111111111
+
+# Every row, column and diagonal, as a mask of its three cells
+WIN_MASKS = (
+	0b000000111, 0b000111000, 0b111000000,
+	0b001001001, 0b010010010, 0b100100100,
+	0b100010001, 0b001010100,
+)
+
+# Cell index (and its bit) for every action (i, j), and back
+CELLS = [(i, j) for i in range(3) for j in range(3)]
+BITS = {action: 1 << cell for cell, action in enumerate(CELLS)}
+
+INITIAL_STATE = (0, 0)
+
+
+def from_board(board):
+	"""Returns the bitboard state of a list-of-lists board."""
+	x = o = 0
+	for cell, (i, j) in enumerate(CELLS):
+		if board[i][j] == ttt.X:
+			x |= 1 << cell
+		elif board[i][j] == ttt.O:
+			o |= 1 << cell
+	return x, o
+
+
+def to_board(state):
+	"""Returns the list-of-lists board of a bitboard state."""
+	x, o = state
+	board = ttt.initial_state()
+	for cell, (i, j) in enumerate(CELLS):
+		if x >> cell & 1:
+			board[i][j] = ttt.X
+		elif o >> cell & 1:
+			board[i][j] = ttt.O
+	return board
+
+
+def player(state):
+	x, o = state
+	return ttt.X if bin(x).count("1") == bin(o).count("1") else ttt.O
+
+
+def actions(state):
+	"""Returns the bits of every empty cell."""
+	empty = ~(state[0] | state[1]) & FULL
+	moves = []
+	while empty:
+		move = empty & -empty
+		moves.append(move)
+		empty ^= move
+	return moves
+
+
+def result(state, move):
+	"""Returns the state after the player to move marks the `move` bit."""
+	x, o = state
+	if (x | o) & move:
+		raise Exception("You cannot make that action!")
+	if bin(x).count("1") == bin(o).count("1"):
+		return x | move, o
+	return x, o | move
+
+
+def won(marks):
+	"""Returns True if `marks` contain three in a row."""
+	for mask in WIN_MASKS:
+		if marks & mask == mask:
+			return True
+	return False
+
+
+def winner(state):
+	x, o = state
+	if won(x):
+		return ttt.X
+	if won(o):
+		return ttt.O
+	return None
+
+
+def terminal(state):
+	x, o = state
+	return (x | o) == FULL or won(x) or won(o)
+
+
+def utility(state):
+	x, o = state
+	if won(x):
+		return 1
+	if won(o):
+		return -1
+	return 0
+
+
+# Exact minimax value of every state searched so far
+values = dict()
+
+
+def value(state):
+	"""Returns the minimax value of `state` (1 if X wins, -1 if O wins)."""
+	if state in values:
+		return values[state]
+	x, o = state
+	if won(x):
+		best = 1
+	elif won(o):
+		best = -1
+	elif (x | o) == FULL:
+		best = 0
+	elif bin(x).count("1") == bin(o).count("1"):
+		best = -1
+		for move in actions(state):
+			best = max(best, value((x | move, o)))
+			if best == 1:
+				break
+	else:
+		best = 1
+		for move in actions(state):
+			best = min(best, value((x, o | move)))
+			if best == -1:
+				break
+	values[state] = best
+	return best
+
+
+def minimax(state):
+	"""Returns the optimal move bit for the player to move, or None."""
+	if terminal(state):
+		return None
+	maximizing = player(state) == ttt.X
+	best_move = None
+	best_value = None
+	for move in actions(state):
+		score = value(result(state, move))
+		if best_value is None or (
+			score > best_value if maximizing else score < best_value
+		):
+			best_move, best_value = move, score
+	return best_move
+
+
+def board_minimax(board):
+	"""
+	Returns the optimal action (i, j) for a list-of-lists board, so the
+	bitboard engine can stand in for `tictactoe.minimax` in runner.py.
+	"""
+	move = minimax(from_board(board))
+	if move is None:
+		return None
+	return CELLS[move.bit_length() - 1]
@@ -0,0 +1,331 @@
+"""
+m,n,k-game Player
+
+Tic Tac Toe generalized to an m-row, n-column board on which the first
+player to get k marks in a row (horizontally, vertically or diagonally)
+wins. Boards use the same list-of-lists layout as tictactoe.py.
+"""
+
+import sys
+import time
+
+from tictactoe import X, O, EMPTY
+
+# Score of a win found during search, reduced by the number of plies it
+# takes so that faster wins are preferred
+WIN = 10 ** 9
+
+# Boards with more cells than this only consider moves next to existing
+# marks, which keeps the branching factor of large boards manageable
+NEIGHBORHOOD_LIMIT = 16
+
+
+class Timeout(Exception):
+	"""Raised inside the search when the move's time budget runs out."""
+
+
+class Game():
+
+	def __init__(self, m=3, n=3, k=3):
+		"""
+		Creates an m-row, n-column game that is won with k in a row.
+		"""
+		if k > max(m, n):
+			raise ValueError("k cannot be larger than the board")
+		self.m = m
+		self.n = n
+		self.k = k
+		self.full = (1 << (m * n)) - 1
+
+		# Every line of k cells as a bitmask, and the lines through each cell
+		self.lines = []
+		for i in range(m):
+			for j in range(n):
+				for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+					end_i, end_j = i + di * (k - 1), j + dj * (k - 1)
+					if 0 <= end_i < m and 0 <= end_j < n:
+						mask = 0
+						for step in range(k):
+							mask |= 1 << self.cell(i + di * step, j + dj * step)
+						self.lines.append(mask)
+		self.cell_lines = [
+			[line for line in self.lines if line >> cell & 1]
+			for cell in range(m * n)
+		]
+
+		# Cells around each cell, and how central each cell is
+		self.neighbors = []
+		self.centrality = []
+		for i in range(m):
+			for j in range(n):
+				mask = 0
+				for di in (-1, 0, 1):
+					for dj in (-1, 0, 1):
+						if (di or dj) and 0 <= i + di < m and 0 <= j + dj < n:
+							mask |= 1 << self.cell(i + di, j + dj)
+				self.neighbors.append(mask)
+				self.centrality.append(
+					-abs(2 * i - (m - 1)) - abs(2 * j - (n - 1))
+				)
+
+		# Heuristic weight of a line holding c marks of a single player
+		self.weights = [0] + [4 ** c for c in range(1, k + 1)]
+
+		# Scores this close to WIN are wins found by the search
+		self.win_threshold = WIN - m * n
+
+		self.table = dict()
+		self.nodes = 0
+		self.deadline = None
+
+	def cell(self, i, j):
+		return i * self.n + j
+
+	def initial_state(self):
+		"""
+		Returns starting state of the board.
+		"""
+		return [[EMPTY] * self.n for _ in range(self.m)]
+
+	def bits(self, board):
+		"""Returns the (x, o) bitboards of a list-of-lists board."""
+		x = o = 0
+		for i in range(self.m):
+			for j in range(self.n):
+				if board[i][j] == X:
+					x |= 1 << self.cell(i, j)
+				elif board[i][j] == O:
+					o |= 1 << self.cell(i, j)
+		return x, o
+
+	def won(self, marks):
+		for line in self.lines:
+			if marks & line == line:
+				return True
+		return False
+
+	def player(self, board):
+		x, o = self.bits(board)
+		return X if bin(x).count("1") == bin(o).count("1") else O
+
+	def actions(self, board):
+		return {
+			(i, j) for i in range(self.m) for j in range(self.n)
+			if board[i][j] == EMPTY
+		}
+
+	def result(self, board, action):
+		i, j = action
+		if board[i][j] != EMPTY:
+			raise Exception("You cannot make that action!")
+		board_copy = [row[:] for row in board]
+		board_copy[i][j] = self.player(board)
+		return board_copy
+
+	def winner(self, board):
+		x, o = self.bits(board)
+		if self.won(x):
+			return X
+		if self.won(o):
+			return O
+		return None
+
+	def terminal(self, board):
+		x, o = self.bits(board)
+		return (x | o) == self.full or self.won(x) or self.won(o)
+
+	def utility(self, board):
+		winner = self.winner(board)
+		if winner == X:
+			return 1
+		if winner == O:
+			return -1
+		return 0
+
+	def evaluate(self, me, opponent):
+		"""
+		Heuristic value of a position for the player to move: lines still
+		open to a single player count for that player, more so the more
+		marks they already hold.
+		"""
+		score = 0
+		weights = self.weights
+		for line in self.lines:
+			mine = me & line
+			theirs = opponent & line
+			if not theirs:
+				if mine:
+					score += weights[bin(mine).count("1")]
+			elif not mine:
+				score -= weights[bin(theirs).count("1")]
+		return score
+
+	def moves(self, me, opponent, first=None):
+		"""
+		Returns the empty cells to try, best first: the transposition
+		table's move, then cells next to many marks, then central cells.
+		"""
+		occupied = me | opponent
+		empty = ~occupied & self.full
+		if occupied and self.m * self.n > NEIGHBORHOOD_LIMIT:
+			near = 0
+			remaining = occupied
+			while remaining:
+				bit = remaining & -remaining
+				near |= self.neighbors[bit.bit_length() - 1]
+				remaining ^= bit
+			if empty & near:
+				empty &= near
+
+		cells = []
+		while empty:
+			bit = empty & -empty
+			cells.append(bit.bit_length() - 1)
+			empty ^= bit
+		neighbors, centrality = self.neighbors, self.centrality
+		cells.sort(key=lambda cell: (
+			cell != first,
+			-bin(neighbors[cell] & occupied).count("1"),
+			-centrality[cell]
+		))
+		return cells
+
+	def negamax(self, me, opponent, depth, alpha, beta, ply):
+		"""
+		Alpha-beta search of the position where `me` is to move, returning
+		its value from `me`'s point of view.
+		"""
+		self.nodes += 1
+		if self.nodes & 1023 == 0 and time.perf_counter() > self.deadline:
+			raise Timeout
+
+		if (me | opponent) == self.full:
+			return 0
+		if depth == 0:
+			return self.evaluate(me, opponent)
+
+		original_alpha = alpha
+		entry = self.table.get((me, opponent))
+		first = None
+		if entry is not None:
+			entry_depth, value, flag, first = entry
+			value = self.from_table(value, ply)
+			if entry_depth >= depth:
+				if flag == 0:
+					return value
+				if flag < 0:
+					beta = min(beta, value)
+				else:
+					alpha = max(alpha, value)
+				if alpha >= beta:
+					return value
+
+		best, best_cell = -WIN - 1, None
+		for cell in self.moves(me, opponent, first):
+			bit = 1 << cell
+			mine = me | bit
+			if any(mine & line == line for line in self.cell_lines[cell]):
+				value = WIN - ply
+			else:
+				value = -self.negamax(
+					opponent, mine, depth - 1, -beta, -alpha, ply + 1
+				)
+			if value > best:
+				best, best_cell = value, cell
+			alpha = max(alpha, value)
+			if alpha >= beta:
+				break
+
+		# Flag: 0 exact value, -1 upper bound, 1 lower bound
+		if best <= original_alpha:
+			flag = -1
+		elif best >= beta:
+			flag = 1
+		else:
+			flag = 0
+		self.table[(me, opponent)] = (
+			depth, self.to_table(best, ply), flag, best_cell
+		)
+		return best
+
+	def to_table(self, value, ply):
+		"""
+		Returns a search score as stored in the transposition table: wins
+		count plies from the stored position instead of from the root.
+		"""
+		if value >= self.win_threshold:
+			return value + ply
+		if value <= -self.win_threshold:
+			return value - ply
+		return value
+
+	def from_table(self, value, ply):
+		"""Returns a stored score as seen from a node `ply` plies deep."""
+		if value >= self.win_threshold:
+			return value - ply
+		if value <= -self.win_threshold:
+			return value + ply
+		return value
+
+	def minimax(self, board, time_limit=1.0, max_depth=None):
+		"""
+		Returns the best action for the player to move, searching with
+		iterative deepening until `time_limit` seconds have passed (or
+		`max_depth` plies were searched) and keeping the move from the last
+		search that finished. Returns None on a terminal board.
+		"""
+		if self.terminal(board):
+			return None
+		x, o = self.bits(board)
+		me, opponent = (x, o) if self.player(board) == X else (o, x)
+		empty_cells = bin(~(x | o) & self.full).count("1")
+		max_depth = min(max_depth or empty_cells, empty_cells)
+
+		self.deadline = time.perf_counter() + time_limit
+		self.nodes = 0
+		self.table.clear()
+		best_cell = self.moves(me, opponent)[0]
+		for depth in range(1, max_depth + 1):
+			try:
+				value = self.negamax(me, opponent, depth, -WIN - 1, WIN + 1, 0)
+			except Timeout:
+				break
+			best_cell = self.table[(me, opponent)][3]
+			if abs(value) >= self.win_threshold:
+				break
+		return divmod(best_cell, self.n)
+
+
+def main():
+	"""Plays an m,n,k-game against the computer in the terminal."""
+	if len(sys.argv) not in [1, 4, 5]:
+		sys.exit("Usage: python mnk.py [m n k [seconds per move]]")
+	m, n, k = (int(arg) for arg in sys.argv[1:4]) if len(sys.argv) > 1 else (7, 7, 4)
+	time_limit = float(sys.argv[4]) if len(sys.argv) == 5 else 1.0
+
+	game = Game(m, n, k)
+	board = game.initial_state()
+	user = input("Play as X or O? ").strip().upper() or X
+	while not game.terminal(board):
+		print()
+		for row in board:
+			print(" ".join(cell or "." for cell in row))
+		if game.player(board) == user:
+			try:
+				i, j = (int(value) for value in input("Row and column: ").split())
+				board = game.result(board, (i, j))
+			except EOFError:
+				sys.exit()
+			except Exception as e:
+				print(f"Invalid move: {e}")
+		else:
+			board = game.result(board, game.minimax(board, time_limit))
+	print()
+	for row in board:
+		print(" ".join(cell or "." for cell in row))
+	winner = game.winner(board)
+	print("Game Over: Tie." if winner is None else f"Game Over: {winner} wins.")
+
+
+if __name__ == "__main__":
+	main()
@@ -4,6 +4,7 @@ Tic Tac Toe Player
 
 import math
 import copy
+import pickle
 X = "X"
 O = "O"
 EMPTY = None
@@ -134,47 +135,139 @@ def utility(board):
 	return 0
 
 
+def symmetries():
+	"""
+	Returns the 8 symmetries of the board (rotations and reflections), each
+	as the tuple of cells (row-major indices) moved to every position.
+	"""
+	result = []
+	for transpose in (False, True):
+		for rotation in range(4):
+			cells = list(range(9))
+			for _ in range(rotation):
+				cells = [cells[3 * (2 - j) + i] for i in range(3) for j in range(3)]
+			if transpose:
+				cells = [cells[3 * j + i] for i in range(3) for j in range(3)]
+			result.append(tuple(cells))
+	return result
+
+
+SYMMETRIES = symmetries()
+CELL_CODES = {EMPTY: 0, X: 1, O: 2}
+
+# Transposition table: minimax value of every position searched so far,
+# keyed by `canonical(board)`. Values do not depend on how a position was
+# reached, so the table is kept for the whole session
+transpositions = dict()
+
+
+def canonical(board):
+	"""
+	Returns a key identifying the board up to rotation and reflection: the
+	smallest base-3 encoding of the board over its 8 symmetries.
+	"""
+	return canonical_form(board)[0]
+
+
+def canonical_form(board):
+	"""
+	Returns the canonical key of the board together with the symmetry that
+	produces it: cell p of the canonical board is cell symmetry[p] of
+	`board`.
+	"""
+	cells = [CELL_CODES[cell] for row in board for cell in row]
+	best = None
+	for symmetry in SYMMETRIES:
+		code = 0
+		for index in symmetry:
+			code = code * 3 + cells[index]
+		if best is None or code < best[0]:
+			best = (code, symmetry)
+	return best
+
+
+def clear_table():
+	"""Forgets every position in the transposition table."""
+	transpositions.clear()
+
+
+def solve_table():
+	"""
+	Fills the transposition table with the value of every position
+	reachable from the initial state.
+	"""
+	solved = set()
+
+	def solve(board):
+		key = canonical(board)
+		if key in solved:
+			return transpositions[key]
+		solved.add(key)
+		if terminal(board):
+			value = utility(board)
+		else:
+			values = [solve(result(board, action)) for action in actions(board)]
+			value = max(values) if player(board) == X else min(values)
+		transpositions[key] = value
+		return value
+	solve(initial_state())
+	return transpositions
+
+
+def save_table(filename):
+	"""Saves the transposition table to a file."""
+	with open(filename, "wb") as f:
+		pickle.dump(transpositions, f, pickle.HIGHEST_PROTOCOL)
+
+
+def load_table(filename):
+	"""Loads a transposition table saved by `save_table`."""
+	with open(filename, "rb") as f:
+		transpositions.update(pickle.load(f))
+
+
 def minimax(board):
 	if terminal(board):
 		return None
-	optimum_actions = set()
-	neutral_actions = set()
+	best_action = None
+	best_value = None
+	maximizing = player(board) == X
 	for action in actions(board):
-		if player(board) == X:
-			min_result = min_value(result(board,action))
-			if min_result == 1:
-				optimum_actions.add(action)
-			elif min_result == 0:
-				neutral_actions.add(action)
+		if maximizing:
+			value = min_value(result(board, action))
+			if best_value is None or value > best_value:
+				best_action, best_value = action, value
 		else:
-			max_result = max_value(result(board,action))
-			if max_result == -1:
-				optimum_actions.add(action)
-			elif max_result == 0:
-				neutral_actions.add(action)
-
-	if not len(optimum_actions):
-		return neutral_actions.pop()
-	return optimum_actions.pop()
+			value = max_value(result(board, action))
+			if best_value is None or value < best_value:
+				best_action, best_value = action, value
+	return best_action
 
 def min_value(board):
+	key = canonical(board)
+	if key in transpositions:
+		return transpositions[key]
 	if terminal(board):
 		return utility(board)
 	val = 2
 	for action in actions(board):
 		val = min(val, max_value(result(board, action)))
 		if val == -1: # Do alpha beta pruning
-			return val
+			break
+	transpositions[key] = val
 	return val
 
 
 def max_value(board):
+	key = canonical(board)
+	if key in transpositions:
+		return transpositions[key]
 	if terminal(board):
 		return utility(board)
 	val = -2
 	for action in actions(board):
 		val = max(val, min_value(result(board, action)))
 		if val == 1: # Do alpha beta pruning
-			return val
+			break
+	transpositions[key] = val
 	return val
-